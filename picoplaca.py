@@ -0,0 +1,4231 @@
+import datetime
+import os
+import argparse
+import re
+import json
+import csv
+import sys
+import threading
+import bisect
+import heapq
+import weakref
+import time as _time
+import mmap
+import struct
+import zlib
+from array import array
+from collections import OrderedDict, namedtuple
+
+# Las dependencias pesadas (requests, numpy, holidays, dateutil, asyncio, sqlite3...) se importan
+# sólo en las funciones que las usan, para que la línea de comandos arranque rápido
+
+# Meses, iguales a holidays.constants
+JAN, FEB, MAR, APR, MAY, JUN, JUL, AUG, SEP, OCT, NOV, DEC = range(1, 13)
+
+
+# Regla declarativa de feriado:
+#   kind: 'fixed' (mes y día fijos) o 'easter' (offset días desde el domingo de Pascua)
+#   shift: nombre de la política de traslado de SHIFT_POLICIES o None
+#   provinces: códigos ISO 3166-2 donde aplica, o None si es nacional
+#   since: primer año en que rige (None si siempre)
+HolidayRule = namedtuple('HolidayRule', 'kind name month day offset shift provinces since', defaults=(None,))
+
+# Política de traslado: offsets[weekday] son los días que se mueve el feriado según el día
+# de la semana de la fecha ancla (la propia fecha si anchor es None), desde el año since
+ShiftPolicy = namedtuple('ShiftPolicy', 'offsets since anchor')
+
+SHIFT_POLICIES = {
+    # (Ley 858/Ley de Reforma a la LOSEP (vigente desde el 21 de diciembre de 2016 /R.O # 906))
+    # sábado o martes: al viernes o lunes inmediato anterior; domingo: al lunes siguiente;
+    # miércoles o jueves: al viernes de esa semana
+    'losep': ShiftPolicy(offsets=(0, -1, 2, 1, 0, -1, 1), since=2016, anchor=None),
+    # Para festivos nacionales y/o locales que coincidan en días corridos (2 y 3 de noviembre)
+    # el traslado depende del día de la semana del 3 de noviembre
+    'difuntos': ShiftPolicy(offsets=(2, 0, 0, 2, 0, 0, -1), since=None, anchor=(NOV, 3)),
+    'cuenca': ShiftPolicy(offsets=(0, 0, -2, 0, 0, -2, 1), since=None, anchor=(NOV, 3)),
+}
+
+HOLIDAY_RULES = (
+    HolidayRule('fixed', "Año Nuevo [New Year's Day]", JAN, 1, 0, None, None),
+    HolidayRule('fixed', "Feliz Navidad [Merry Christmas]", DEC, 25, 0, None, None),
+    # semana santa
+    HolidayRule('easter', "Semana Santa (Viernes Santo) [Good Friday)]", None, None, -2, None, None),
+    HolidayRule('easter', "Día de Pascuas (Dia del Conejo de Pascua) [Easter Day]", None, None, 0, None, None),
+    # Carnaval: 46 días de cuaresma antes de Pascua
+    HolidayRule('easter', "Lunes de carnaval [Carnival of Monday)]", None, None, -48, None, None),
+    HolidayRule('easter', "Martes de carnaval [Tuesday of Carnival)]", None, None, -47, None, None),
+    HolidayRule('fixed', "Día Nacional del Trabajo [Labour Day]", MAY, 1, 0, 'losep', None),
+    HolidayRule('fixed', "Batalla del Pichincha [Pichincha Battle]", MAY, 24, 0, 'losep', None),
+    HolidayRule('fixed', "Primer Grito de la Independencia [First Cry of Independence]", AUG, 10, 0, 'losep', None),
+    HolidayRule('fixed', "Independencia de Guayaquil [Guayaquil's Independence]", OCT, 9, 0, 'losep', None),
+    HolidayRule('fixed', "Día de los difuntos [Dia de los muertos]", NOV, 2, 0, 'difuntos', None),
+    HolidayRule('fixed', "Independencia de Cuenca [Independence of Cuenca]", NOV, 3, 0, 'cuenca', None),
+    # Fundación de Quito, aplica solo para la provincia de Pichincha
+    HolidayRule('fixed', "Fundación de Quito [Foundation of Quito]", DEC, 6, 0, 'losep', ('EC-P',)),
+    # Feriados locales de las demás provincias; las reglas de traslado son las mismas que el día del trabajo.
+    # Las provincias sin feriado local en esta tabla sólo tienen los feriados nacionales
+    HolidayRule('fixed', "Fundación de Guayaquil [Foundation of Guayaquil]", JUL, 25, 0, 'losep', ('EC-G',)),
+    HolidayRule('fixed', "Fundación de Cuenca [Foundation of Cuenca]", APR, 12, 0, 'losep', ('EC-A',)),
+    HolidayRule('fixed', "Día de la Provincia de Galápagos [Galapagos Province Day]", FEB, 12, 0, 'losep', ('EC-W',)),
+    HolidayRule('fixed', "Independencia de Esmeraldas [Independence of Esmeraldas]", AUG, 5, 0, 'losep', ('EC-E',)),
+    HolidayRule('fixed', "Fundación de Ibarra [Foundation of Ibarra]", SEP, 28, 0, 'losep', ('EC-I',)),
+    HolidayRule('fixed', "Provincialización de Manabí [Manabi Province Day]", JUN, 25, 0, 'losep', ('EC-M',)),
+    HolidayRule('fixed', "Provincialización de Los Ríos [Los Rios Province Day]", OCT, 6, 0, 'losep', ('EC-R',)),
+    HolidayRule('fixed', "Independencia de Riobamba [Independence of Riobamba]", NOV, 11, 0, 'losep', ('EC-H',)),
+    HolidayRule('fixed', "Independencia de Latacunga [Independence of Latacunga]", NOV, 11, 0, 'losep', ('EC-X',)),
+    HolidayRule('fixed', "Independencia de Ambato [Independence of Ambato]", NOV, 12, 0, 'losep', ('EC-T',)),
+    HolidayRule('fixed', "Independencia de Loja [Independence of Loja]", NOV, 18, 0, 'losep', ('EC-L',)),
+    HolidayRule('fixed', "Provincialización de Sucumbíos [Sucumbios Province Day]", FEB, 13, 0, 'losep', ('EC-U',), 1990),
+    HolidayRule('fixed', "Provincialización de Orellana [Orellana Province Day]", JUL, 30, 0, 'losep', ('EC-D',), 1999),
+    HolidayRule('fixed', "Provincialización de Santo Domingo de los Tsáchilas [Santo Domingo Province Day]",
+                NOV, 6, 0, 'losep', ('EC-SD',), 2008),
+    HolidayRule('fixed', "Provincialización de Santa Elena [Santa Elena Province Day]", NOV, 7, 0, 'losep', ('EC-SE',), 2008),
+)
+
+# ISO 3166-2 códigos para las subdivisiones principales, llamadas provincias
+# https://es.wikipedia.org/wiki/ISO_3166-2:EC
+PROVINCES = [
+    "EC-A", "EC-B", "EC-C", "EC-D", "EC-E", "EC-F", "EC-G", "EC-H", "EC-I", "EC-L", "EC-M", "EC-N",
+    "EC-O", "EC-P", "EC-R", "EC-S", "EC-SD", "EC-SE", "EC-T", "EC-U", "EC-W", "EC-X", "EC-Y", "EC-Z"]
+
+
+class HolidayRuleSet:
+    """
+    Conjunto de reglas de feriados compilado una sola vez para generar calendarios de
+    muchos años en una pasada, calculando la Pascua una vez por año.
+    ...
+    Atributos
+    ----------
+    rules: tuple de HolidayRule
+        reglas declarativas de origen
+    Metodos
+    -------
+    year(self, year, prov=None):
+        Devuelve los feriados de un año como tuplas (ordinal, nombre)
+    calendars(self, years, prov=None):
+        Devuelve los feriados de varios años en un diccionario {año: [(ordinal, nombre), ...]}
+    """
+
+    def __init__(self, rules, policies=SHIFT_POLICIES):
+        """
+        Se construye todos los atributos necesarios para el objeto HolidayRuleSet.
+        """
+        self.rules = tuple(rules)
+        # Cada regla compilada: (es_pascua, mes, día, offset, política, provincias, desde, nombre)
+        self._compiled = []
+        for rule in self.rules:
+            if rule.kind not in ('fixed', 'easter'):
+                raise ValueError('Tipo de regla de feriado desconocido: {}'.format(rule.kind))
+            policy = policies[rule.shift] if rule.shift is not None else None
+            provinces = frozenset(rule.provinces) if rule.provinces is not None else None
+            self._compiled.append((rule.kind == 'easter', rule.month, rule.day, rule.offset,
+                                   policy, provinces, rule.since, rule.name))
+
+
+    def year(self, year, prov=None):
+        """
+        Genera los feriados de un año
+
+        Parámetros
+        ----------
+        year: int
+            año del calendario
+        prov: str, opcional
+            código de provincia según ISO3166-2; sin provincia sólo se incluyen los nacionales
+        Devoluciones
+        -------
+        Devuelve una lista de tuplas (ordinal, nombre), con ordinal = datetime.date.toordinal()
+        """
+        from dateutil.easter import easter
+        
+        easter_ordinal = easter(year).toordinal()
+        holidays = []
+        for is_easter, month, day, offset, policy, provinces, since, name in self._compiled:
+            if provinces is not None and prov not in provinces:
+                continue
+            if since is not None and year < since:
+                continue
+            if is_easter:
+                ordinal = easter_ordinal + offset
+            else:
+                ordinal = datetime.date(year, month, day).toordinal() + offset
+            if policy is not None and (policy.since is None or year >= policy.since):
+                anchor = ordinal if policy.anchor is None else datetime.date(year, *policy.anchor).toordinal()
+                # toordinal() == 1 (0001-01-01) fue lunes, weekday 0
+                ordinal += policy.offsets[(anchor - 1) % 7]
+            holidays.append((ordinal, name))
+        return holidays
+
+
+    def calendars(self, years, prov=None):
+        """
+        Genera los feriados de varios años en una sola pasada
+
+        Parámetros
+        ----------
+        years: iterable de int
+            años de los calendarios
+        prov: str, opcional
+            código de provincia según ISO3166-2
+        Devoluciones
+        -------
+        Devuelve un diccionario {año: [(ordinal, nombre), ...]}
+        """
+        return {year: self.year(year, prov) for year in years}
+
+
+# Reglas de feriados de Ecuador compiladas, usadas por HolidayEcuador y la cache de calendarios
+ecuador_rules = HolidayRuleSet(HOLIDAY_RULES)
+
+
+def _holiday_ecuador():
+    """
+    Define la clase HolidayEcuador la primera vez que se usa, para importar la librería
+    holidays sólo cuando hace falta; se accede normalmente como HolidayEcuador
+    """
+    cls = globals().get('HolidayEcuador')
+    if cls is not None:
+        return cls
+    from holidays.holiday_base import HolidayBase
+
+    class HolidayEcuador(HolidayBase):
+        """
+        La clase que representa el feriado en Ecuador por provincia (HolidayEcuador)
+        Su objetivo general es determinar si la 
+        fecha específica es vacaciones lo más rápido y flexible posible.
+        https://www.turismo.gob.ec/wp-content/uploads/2020/03/CALENDARIO-DE-FERIADOS.pdf
+        ...
+        Atributos (Hereda la clase HolidayBase)
+        ----------
+        prov: str
+            código de provincia según ISO3166-2
+        Metodos
+        -------
+        __init__(self, plate, date, time, online=False):
+            Construye todos los atributos necesarios para el objeto HolidayEcuador.
+        _populate(self, year):
+            Hace una devolucion si la fecha sale feriado o no
+        """     
+        # ISO 3166-2 códigos para las subdivisiones principales, 
+        # llamadas provincias
+        # https://es.wikipedia.org/wiki/ISO_3166-2:EC
+        PROVINCES = PROVINCES
+
+        def __init__(self, **kwargs):
+            """
+            Se construye todos los atributos necesarios para el objeto HolidayEcuador.
+            """         
+            self.country = "ECU"
+            self.prov = kwargs.pop("prov", "ON")
+            HolidayBase.__init__(self, **kwargs)
+
+        def _populate(self, year):
+            """
+            Comprueba si una fecha es feriado o no
+        
+            Parametros
+            ----------
+            year : int
+                año de una fecha
+            Returns
+            -------
+            Agrega al calendario los días festivos del año según las reglas compiladas de ecuador_rules
+            """                    
+            for ordinal, name in ecuador_rules.year(year, self.prov):
+                self[datetime.date.fromordinal(ordinal)] = name
+
+    # Nombre de módulo, para que pickle la encuentre a través de __getattr__
+    HolidayEcuador.__qualname__ = 'HolidayEcuador'
+    globals()['HolidayEcuador'] = HolidayEcuador
+    return HolidayEcuador
+
+
+def __getattr__(name):
+    # HolidayEcuador se define al primer acceso (ver _holiday_ecuador)
+    if name == 'HolidayEcuador':
+        return _holiday_ecuador()
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+class HolidayCalendarCache:
+    """
+    Cache compartido por todo el proceso con los calendarios de feriados ya construidos.
+    Cada entrada se indexa por (provincia, año) y guarda los días festivos como
+    ordinales de fecha (datetime.date.toordinal), de modo que una consulta es
+    una simple búsqueda en un frozenset y HolidayEcuador._populate se ejecuta
+    una sola vez por provincia y año.
+    ...
+    Atributos
+    ----------
+    maxsize: int
+        número máximo de calendarios (provincia, año) que se conservan; al superarlo
+        se descarta el usado menos recientemente (LRU)
+    Metodos
+    -------
+    get(self, prov, year):
+        Devuelve el frozenset de ordinales festivos de la provincia y año indicados
+    use_snapshot(self, snapshot):
+        Toma los calendarios de una instantánea precalculada en lugar de construirlos
+    put(self, prov, year, calendar):
+        Guarda un calendario ya construido, por ejemplo el recibido por un proceso trabajador
+    warm_up(self, years, prov="EC-P"):
+        Precarga los calendarios de un rango de años
+    clear(self):
+        Vacía la cache
+    """
+
+    def __init__(self, maxsize=512):
+        """
+        Se construye todos los atributos necesarios para el objeto HolidayCalendarCache.
+        """
+        if maxsize < 1:
+            raise ValueError('El tamaño máximo de la cache debe ser mayor o igual a 1')
+        self.maxsize = maxsize
+        self._calendars = OrderedDict()
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+
+    def __len__(self):
+        with self._lock:
+            return len(self._calendars)
+
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._calendars
+
+
+    def _build(self, prov, year):
+        """
+        Construye el calendario de una provincia y año con las reglas compiladas de ecuador_rules,
+        o lo toma de la instantánea precalculada si la cubre
+
+        Parámetros
+        ----------
+        prov: str
+            código de provincia según ISO3166-2
+        year: int
+            año del calendario
+        Devoluciones
+        -------
+        Devuelve un frozenset con los ordinales de los días festivos del año
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.covers(prov, year):
+            return snapshot.get(prov, year)
+        return frozenset(ordinal for ordinal, _ in ecuador_rules.year(year, prov))
+
+
+    def use_snapshot(self, snapshot):
+        """
+        Hace que los calendarios que falten en la cache se tomen de una instantánea
+        precalculada en lugar de construirse; None vuelve a construirlos
+
+        Parámetros
+        ----------
+        snapshot: CalendarSnapshot o None
+            instantánea cargada con CalendarSnapshot.load
+        """
+        self._snapshot = snapshot
+
+
+    def get(self, prov, year):
+        """
+        Obtiene el calendario de una provincia y año, construyéndolo si no está en la cache
+
+        Parámetros
+        ----------
+        prov: str
+            código de provincia según ISO3166-2
+        year: int
+            año del calendario
+        Devoluciones
+        -------
+        Devuelve un frozenset con los ordinales de los días festivos del año
+        """
+        key = (prov, year)
+        with self._lock:
+            calendar = self._calendars.get(key)
+            if calendar is not None:
+                self._calendars.move_to_end(key)
+                return calendar
+        # Se construye fuera del candado para no bloquear a los demás hilos;
+        # si dos hilos construyen el mismo año a la vez, el resultado es idéntico
+        calendar = self._build(prov, year)
+        self.put(prov, year, calendar)
+        return calendar
+
+
+    def put(self, prov, year, calendar):
+        """
+        Guarda en la cache un calendario ya construido
+
+        Parámetros
+        ----------
+        prov: str
+            código de provincia según ISO3166-2
+        year: int
+            año del calendario
+        calendar: iterable de int
+            ordinales de los días festivos del año
+        """
+        key = (prov, year)
+        with self._lock:
+            self._calendars[key] = frozenset(calendar)
+            self._calendars.move_to_end(key)
+            while len(self._calendars) > self.maxsize:
+                self._calendars.popitem(last=False)
+
+
+    def warm_up(self, years, prov="EC-P"):
+        """
+        Precarga los calendarios de varios años, por ejemplo al iniciar el servicio
+
+        Parámetros
+        ----------
+        years: iterable de int
+            años a precargar, por ejemplo range(2020, 2031)
+        prov: str, opcional
+            código de provincia según ISO3166-2 (el valor predeterminado es "EC-P")
+        """
+        missing = [year for year in years if (prov, year) not in self]
+        snapshot = self._snapshot
+        if snapshot is not None:
+            for year in [year for year in missing if snapshot.covers(prov, year)]:
+                self.put(prov, year, snapshot.get(prov, year))
+                missing.remove(year)
+        for year, holidays in ecuador_rules.calendars(missing, prov).items():
+            self.put(prov, year, (ordinal for ordinal, _ in holidays))
+
+
+    def clear(self):
+        """Vacía la cache"""
+        with self._lock:
+            self._calendars.clear()
+
+
+# Cache de calendarios compartida por todas las instancias de PicoPlaca
+holiday_cache = HolidayCalendarCache()
+
+
+class CalendarSnapshot:
+    """
+    Instantánea precalculada de los calendarios de feriados de todas las provincias para
+    un rango de años, guardada en un único archivo compacto. El archivo se carga con mmap
+    y el calendario de cada provincia se decodifica sólo la primera vez que se consulta.
+
+    Formato del archivo (little-endian): cabecera de 16 bytes (firma b'PYPS', versión,
+    número de provincias, primer año, último año), un índice de 16 bytes por provincia
+    (código de 8 bytes, posición y cantidad de ordinales) y, por provincia, los ordinales
+    (datetime.date.toordinal) de sus feriados como enteros sin signo de 32 bits ordenados.
+    ...
+    Atributos
+    ----------
+    first_year: int
+        primer año de la instantánea
+    last_year: int
+        último año de la instantánea (incluido)
+    Metodos
+    -------
+    write(path, first_year, last_year, provinces=PROVINCES):
+        Calcula y guarda la instantánea
+    load(path):
+        Carga con mmap una instantánea guardada
+    covers(self, prov, year):
+        Devuelve True si la instantánea incluye la provincia y el año
+    get(self, prov, year):
+        Devuelve el frozenset de ordinales festivos de la provincia y año
+    close(self):
+        Libera el mapeo de memoria
+    """
+    MAGIC = b'PYPS'
+    VERSION = 1
+    _header = struct.Struct('<4sHHii')
+    _entry = struct.Struct('<8sII')
+
+    def __init__(self, buffer, first_year, last_year, index, file=None):
+        """
+        Se construye todos los atributos necesarios para el objeto CalendarSnapshot; normalmente
+        se usa CalendarSnapshot.load en lugar de llamarlo directamente.
+        """
+        self._buf = buffer
+        self._file = file
+        self._index = index
+        self._provinces = {}
+        self._lock = threading.Lock()
+        self.first_year = first_year
+        self.last_year = last_year
+
+
+    @classmethod
+    def write(cls, path, first_year, last_year, provinces=PROVINCES):
+        """
+        Calcula con las reglas compiladas los calendarios de todas las provincias y los guarda
+
+        Parámetros
+        ----------
+        path: str
+            archivo de destino
+        first_year: int
+            primer año
+        last_year: int
+            último año (incluido)
+        provinces: lista de str, opcional
+            códigos de provincia según ISO3166-2 (por defecto todas)
+        """
+        if last_year < first_year:
+            raise ValueError('El último año debe ser mayor o igual al primero')
+        years = range(first_year, last_year + 1)
+        data = []
+        for prov in provinces:
+            ordinals = array('I', sorted({ordinal for holidays in ecuador_rules.calendars(years, prov).values()
+                                          for ordinal, _ in holidays}))
+            if sys.byteorder != 'little':
+                ordinals.byteswap()
+            data.append((prov, ordinals))
+        offset = cls._header.size + cls._entry.size * len(data)
+        with open(path, 'wb') as f:
+            f.write(cls._header.pack(cls.MAGIC, cls.VERSION, len(data), first_year, last_year))
+            for prov, ordinals in data:
+                f.write(cls._entry.pack(prov.encode('ascii'), offset, len(ordinals)))
+                offset += 4 * len(ordinals)
+            for _, ordinals in data:
+                f.write(ordinals.tobytes())
+
+
+    @classmethod
+    def load(cls, path):
+        """
+        Carga con mmap una instantánea, leyendo sólo la cabecera y el índice
+
+        Parámetros
+        ----------
+        path: str
+            archivo generado por CalendarSnapshot.write
+        Devoluciones
+        -------
+        Devuelve un objeto CalendarSnapshot
+        Aumenta
+        ------
+        ValorError
+            Si el archivo no es una instantánea válida
+        """
+        with open(path, 'rb') as f:
+            try:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError('El archivo {} no es una instantánea de calendarios válida'.format(path)) from None
+        try:
+            magic, version, count, first_year, last_year = cls._header.unpack_from(buf)
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise ValueError
+            index = {}
+            for i in range(count):
+                code, offset, length = cls._entry.unpack_from(buf, cls._header.size + i * cls._entry.size)
+                if offset + 4 * length > len(buf):
+                    raise ValueError
+                index[code.rstrip(b'\0').decode('ascii')] = (offset, length)
+        except (ValueError, struct.error):
+            buf.close()
+            raise ValueError('El archivo {} no es una instantánea de calendarios válida'.format(path)) from None
+        return cls(buf, first_year, last_year, index)
+
+
+    def covers(self, prov, year):
+        """Devuelve True si la instantánea incluye la provincia y el año"""
+        return prov in self._index and self.first_year <= year <= self.last_year
+
+
+    def get(self, prov, year):
+        """
+        Devuelve el calendario de una provincia y año
+
+        Parámetros
+        ----------
+        prov: str
+            código de provincia según ISO3166-2
+        year: int
+            año del calendario
+        Devoluciones
+        -------
+        Devuelve un frozenset con los ordinales de los días festivos del año
+        Aumenta
+        ------
+        KeyError
+            Si la instantánea no incluye la provincia o el año
+        """
+        if not self.covers(prov, year):
+            raise KeyError((prov, year))
+        calendars = self._provinces.get(prov)
+        if calendars is None:
+            offset, length = self._index[prov]
+            ordinals = array('I')
+            ordinals.frombytes(self._buf[offset:offset + 4 * length])
+            if sys.byteorder != 'little':
+                ordinals.byteswap()
+            calendars = {year: set() for year in range(self.first_year, self.last_year + 1)}
+            for ordinal in ordinals:
+                year_ = datetime.date.fromordinal(ordinal).year
+                # Un feriado trasladado podría caer fuera del rango de años
+                if year_ in calendars:
+                    calendars[year_].add(ordinal)
+            calendars = {year_: frozenset(days) for year_, days in calendars.items()}
+            with self._lock:
+                self._provinces[prov] = calendars
+        return calendars[year]
+
+
+    def close(self):
+        """Libera el mapeo de memoria"""
+        self._buf.close()
+
+
+class TokenBucket:
+    """
+    Limitador de tasa de tipo cubeta de fichas (token bucket), seguro entre hilos
+    ...
+    Atributos
+    ----------
+    rate: float
+        fichas que se reponen por segundo
+    capacity: float
+        número máximo de fichas acumuladas (tamaño de ráfaga)
+    Metodos
+    -------
+    acquire(self):
+        Espera hasta que haya una ficha disponible y la consume
+    """
+
+    def __init__(self, rate, capacity=1):
+        """
+        Se construye todos los atributos necesarios para el objeto TokenBucket.
+        """
+        if rate <= 0 or capacity < 1:
+            raise ValueError('La tasa debe ser positiva y la capacidad mayor o igual a 1')
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = _time.monotonic()
+        self._lock = threading.Lock()
+
+
+    def acquire(self):
+        """Espera hasta que haya una ficha disponible y la consume"""
+        with self._lock:
+            now = _time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                _time.sleep((1 - self._tokens) / self.rate)
+                self._updated = _time.monotonic()
+                self._tokens = 1
+            self._tokens -= 1
+
+
+class AbstractHolidayClient:
+    """
+    Cliente de la API de vacaciones de abstractapi usada en el modo en línea.
+    Reutiliza las conexiones con una requests.Session, respeta los límites de la
+    versión gratuita (1 solicitud por segundo y 1000 solicitudes por mes) y guarda
+    las respuestas en una cache en disco (SQLite) por fecha, de modo que cada fecha
+    se consulta a lo sumo una vez mientras su respuesta no caduque. Con sync se descargan
+    los feriados de años completos a una instantánea local indexada por fecha, y mientras
+    esa instantánea esté vigente is_holiday responde desde memoria sin usar la red.
+    https://www.abstractapi.com/holidays-api
+    ...
+    Atributos
+    ----------
+    api_key: str
+        clave de la API (por defecto la variable de entorno HOLIDAYS_API_KEY)
+    base_url: str
+        dirección de la API; se puede apuntar a un servidor local para pruebas
+    cache_path: str
+        archivo SQLite de la cache (por defecto la variable de entorno HOLIDAYS_API_CACHE
+        o ~/.cache/picoplaca/abstractapi.sqlite3); ':memory:' desactiva la persistencia
+    ttl: float
+        segundos durante los que una respuesta guardada se considera vigente
+    monthly_quota: int
+        número máximo de solicitudes por mes calendario
+    Metodos
+    -------
+    is_holiday(self, date):
+        Devuelve True si la fecha es feriado según la API
+    lookup(self, date):
+        Devuelve (feriado, en_cache) para la fecha
+    sync(self, years, granularity='month'):
+        Descarga los feriados de años completos a la instantánea local
+    compare_offline(self, years, prov='EC-P'):
+        Informa las fechas en que la instantánea y el calendario de HolidayEcuador no coinciden
+    close(self):
+        Cierra la sesión HTTP y la cache en disco
+    """
+    BASE_URL = "https://holidays.abstractapi.com/v1/"
+    # Segundos entre relecturas de la tabla synced para un año que no tiene instantánea vigente
+    SNAPSHOT_RECHECK = 60.0
+
+    def __init__(self, api_key=None, base_url=None, cache_path=None, ttl=30 * 24 * 3600,
+                 rate=1.0, monthly_quota=1000, pool_maxsize=10, timeout=10):
+        """
+        Se construye todos los atributos necesarios para el objeto AbstractHolidayClient.
+        """
+        import requests
+        import requests.adapters
+        import sqlite3
+        
+        self.api_key = api_key if api_key is not None else os.environ.get('HOLIDAYS_API_KEY')
+        self.base_url = base_url or self.BASE_URL
+        if cache_path is None:
+            cache_path = os.environ.get('HOLIDAYS_API_CACHE') or os.path.join(
+                os.path.expanduser('~'), '.cache', 'picoplaca', 'abstractapi.sqlite3')
+        if cache_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.monthly_quota = monthly_quota
+        self.timeout = timeout
+        self._limiter = TokenBucket(rate)
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(cache_path, check_same_thread=False)
+        with self._db:
+            self._db.execute('CREATE TABLE IF NOT EXISTS responses '
+                             '(date TEXT PRIMARY KEY, body TEXT NOT NULL, fetched REAL NOT NULL)')
+            self._db.execute('CREATE TABLE IF NOT EXISTS quota '
+                             '(month TEXT PRIMARY KEY, used INTEGER NOT NULL)')
+            self._db.execute('CREATE TABLE IF NOT EXISTS snapshot '
+                             '(date TEXT PRIMARY KEY, year INTEGER NOT NULL, name TEXT NOT NULL)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS snapshot_year ON snapshot (year)')
+            self._db.execute('CREATE TABLE IF NOT EXISTS synced '
+                             '(year INTEGER PRIMARY KEY, fetched REAL NOT NULL)')
+        # Instantáneas en memoria {año: (frozenset de fechas AAAA-MM-DD o None, momento de descarga,
+        # momento de la última lectura del disco)}
+        self._snapshots = {}
+
+
+    def _cached(self, date):
+        """Devuelve el cuerpo guardado de la fecha si sigue vigente, de lo contrario None"""
+        with self._lock:
+            row = self._db.execute('SELECT body, fetched FROM responses WHERE date = ?',
+                                   (date,)).fetchone()
+        if row is None or _time.time() - row[1] > self.ttl:
+            return None
+        return row[0]
+
+
+    def _consume_quota(self):
+        """
+        Registra una solicitud en la cuota del mes actual
+
+        Aumenta
+        ------
+        requests.HTTPError
+            Si ya se agotó la cuota mensual
+        """
+        import requests
+        
+        month = datetime.date.today().strftime('%Y-%m')
+        with self._lock, self._db:
+            row = self._db.execute('SELECT used FROM quota WHERE month = ?', (month,)).fetchone()
+            used = row[0] if row else 0
+            if used >= self.monthly_quota:
+                raise requests.HTTPError(
+                    'Monthly quota of {} requests exhausted for {}'.format(self.monthly_quota, month))
+            self._db.execute('INSERT OR REPLACE INTO quota (month, used) VALUES (?, ?)', (month, used + 1))
+
+
+    def _fetch(self, params):
+        """
+        Realiza una solicitud a la API respetando el límite de tasa y la cuota mensual
+
+        Parámetros
+        ----------
+        params: dict
+            parámetros de la consulta además de api_key y country
+        Devoluciones
+        -------
+        Devuelve la lista de feriados decodificada de la respuesta JSON
+        """
+        import requests
+        
+        self._consume_quota()
+        self._limiter.acquire()
+        response = self._session.get(
+            self.base_url, params=dict(params, api_key=self.api_key, country='EC'), timeout=self.timeout)
+        if (response.status_code == 401):
+            # This means there is a missing API key
+            raise requests.HTTPError(
+                'Missing API key. Store your key in the enviroment variable HOLIDAYS_API_KEY')
+        response.raise_for_status()
+        return response.json()
+
+
+    @staticmethod
+    def _is_holiday_body(body):
+        """Interpreta la lista de feriados devuelta por la API para un día"""
+        # Arreglar el Jueves Santo incorrectamente denotado como feriado
+        return any(holiday.get('name') != 'Maundy Thursday' for holiday in body)
+
+
+    def _snapshot(self, year):
+        """
+        Devuelve el frozenset de fechas festivas de la instantánea del año si existe
+        y está vigente, de lo contrario None
+        """
+        now = _time.time()
+        entry = self._snapshots.get(year)
+        # Un año ausente o caducado se vuelve a buscar en el disco cada SNAPSHOT_RECHECK segundos,
+        # porque otro proceso que comparta la cache puede haberlo sincronizado mientras tanto
+        if entry is None or (now - entry[1] > self.ttl and now - entry[2] > self.SNAPSHOT_RECHECK):
+            with self._lock:
+                row = self._db.execute('SELECT fetched FROM synced WHERE year = ?', (year,)).fetchone()
+                entry = (None, 0.0, now)
+                if row is not None:
+                    entry = (frozenset(date for (date,) in self._db.execute(
+                        'SELECT date FROM snapshot WHERE year = ?', (year,))), row[0], now)
+                self._snapshots[year] = entry
+        days, fetched, _ = entry
+        if days is None or now - fetched > self.ttl:
+            return None
+        return days
+
+
+    @staticmethod
+    def _normalize(holiday):
+        """
+        Devuelve la fecha AAAA-MM-DD de un feriado de la API, que la informa en los campos
+        date_year, date_month y date_day o en el campo date con el formato MM/DD/AAAA
+        """
+        if 'date_year' in holiday:
+            return '{:04d}-{:02d}-{:02d}'.format(
+                int(holiday['date_year']), int(holiday['date_month']), int(holiday['date_day']))
+        month, day, year = holiday['date'].split('/')
+        return '{:04d}-{:02d}-{:02d}'.format(int(year), int(month), int(day))
+
+
+    def sync(self, years, granularity='month'):
+        """
+        Descarga los feriados de años completos, los normaliza (incluida la corrección del
+        Jueves Santo) y los guarda en la instantánea local, reemplazando la anterior
+
+        Parámetros
+        ----------
+        years: iterable de int
+            años a sincronizar
+        granularity: str, opcional
+            'year' hace una solicitud por año y 'month' una por mes (el valor predeterminado es 'month')
+        Devoluciones
+        -------
+        Devuelve un diccionario {año: {fecha AAAA-MM-DD: nombre}}
+        """
+        if granularity not in ('year', 'month'):
+            raise ValueError('La granularidad debe ser year o month')
+        result = {}
+        for year in years:
+            if granularity == 'year':
+                holidays = self._fetch({'year': year})
+            else:
+                holidays = [h for month in range(1, 13) for h in self._fetch({'year': year, 'month': month})]
+            days = {}
+            for holiday in holidays:
+                # Arreglar el Jueves Santo incorrectamente denotado como feriado
+                if holiday.get('name') == 'Maundy Thursday':
+                    continue
+                date = self._normalize(holiday)
+                if date.startswith(str(year)):
+                    days[date] = '; '.join(filter(None, (days.get(date), holiday.get('name', ''))))
+            fetched = _time.time()
+            with self._lock, self._db:
+                self._db.execute('DELETE FROM snapshot WHERE year = ?', (year,))
+                self._db.executemany('INSERT INTO snapshot (date, year, name) VALUES (?, ?, ?)',
+                                     [(date, year, name) for date, name in days.items()])
+                self._db.execute('INSERT OR REPLACE INTO synced (year, fetched) VALUES (?, ?)', (year, fetched))
+                self._snapshots[year] = (frozenset(days), fetched, fetched)
+            result[year] = days
+        return result
+
+
+    def compare_offline(self, years, prov='EC-P'):
+        """
+        Compara la instantánea sincronizada con el calendario fuera de línea de HolidayEcuador
+
+        Parámetros
+        ----------
+        years: iterable de int
+            años a comparar; deben estar sincronizados
+        prov: str, opcional
+            código de provincia según ISO3166-2 (el valor predeterminado es "EC-P")
+        Devoluciones
+        -------
+        Devuelve una lista ordenada de tuplas (fecha AAAA-MM-DD, nombre en la API o None,
+        nombre fuera de línea o None) con las fechas en que sólo una de las dos fuentes indica feriado
+        Aumenta
+        ------
+        KeyError
+            Si algún año no está sincronizado
+        """
+        differences = []
+        for year in years:
+            with self._lock:
+                if self._db.execute('SELECT 1 FROM synced WHERE year = ?', (year,)).fetchone() is None:
+                    raise KeyError('El año {} no está sincronizado'.format(year))
+                api = dict(self._db.execute('SELECT date, name FROM snapshot WHERE year = ?', (year,)))
+            offline = {}
+            for ordinal, name in ecuador_rules.year(year, prov):
+                date = datetime.date.fromordinal(ordinal).isoformat()
+                offline[date] = '; '.join(filter(None, (offline.get(date), name)))
+            for date in sorted(set(api) ^ set(offline)):
+                differences.append((date, api.get(date), offline.get(date)))
+        return differences
+
+
+    def is_holiday(self, date):
+        """
+        Comprueba si la fecha es un día festivo en Ecuador según la API, respondiendo desde
+        la instantánea sincronizada cuando está vigente
+
+        Parámetros
+        ----------
+        date: str
+            Está siguiendo el formato ISO 8601 AAAA-MM-DD: por ejemplo, 2020-04-22
+        Devoluciones
+        -------
+        Devuelve Verdadero (True) si la fecha es un dia festivo en Ecuador, caso contrario, sera Falso (False)
+        """
+        return self.lookup(date)[0]
+
+
+    def lookup(self, date):
+        """
+        Igual que is_holiday, pero informa además si la respuesta salió de la instantánea o de la cache
+
+        Parámetros
+        ----------
+        date: str
+            Está siguiendo el formato ISO 8601 AAAA-MM-DD: por ejemplo, 2020-04-22
+        Devoluciones
+        -------
+        Devuelve una tupla (feriado, en_cache) de booleanos
+        """
+        days = self._snapshot(int(date[:4]))
+        if days is not None:
+            return date in days, True
+        body = self._cached(date)
+        if body is not None:
+            return self._is_holiday_body(json.loads(body)), True
+        y, m, d = date.split('-')
+        holidays = self._fetch({'year': y, 'month': m, 'day': d})
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO responses (date, body, fetched) VALUES (?, ?, ?)',
+                             (date, json.dumps(holidays), _time.time()))
+        return self._is_holiday_body(holidays), False
+
+
+    def close(self):
+        """Cierra la sesión HTTP y la cache en disco"""
+        self._session.close()
+        with self._lock:
+            self._db.close()
+
+
+_online_client = None
+_online_client_lock = threading.Lock()
+
+
+def online_client():
+    """
+    Devuelve el cliente AbstractHolidayClient compartido por el modo en línea, creándolo al primer uso
+    """
+    global _online_client
+    with _online_client_lock:
+        if _online_client is None:
+            _online_client = AbstractHolidayClient()
+        return _online_client
+
+
+class AsyncHolidayResolver:
+    """
+    Resuelve feriados en línea desde código asyncio sin bloquear el bucle de eventos.
+    Las consultas al cliente bloqueante se ejecutan en un grupo propio de max_concurrency
+    hilos, las consultas simultáneas de una misma fecha comparten una única solicitud y,
+    si la API tarda más que el tiempo límite o no se puede conectar, se responde con
+    el calendario fuera de línea de HolidayEcuador. Una consulta que superó el tiempo
+    límite sigue ocupando su lugar hasta que su hilo termina, así que nunca hay más de
+    max_concurrency solicitudes a la API en curso.
+    ...
+    Atributos
+    ----------
+    client: AbstractHolidayClient
+        cliente bloqueante de la API (por defecto el compartido por online_client())
+    max_concurrency: int
+        número máximo de solicitudes a la API en curso
+    timeout: float
+        segundos de espera antes de usar el calendario fuera de línea
+    prov: str
+        código de provincia según ISO3166-2 del calendario de respaldo cuando is_holiday
+        no recibe otra
+    Metodos
+    -------
+    is_holiday(self, date, prov=None):
+        Corrutina que devuelve True si la fecha es feriado
+    lookup(self, date, prov=None):
+        Corrutina que devuelve (feriado, en_cache) para la fecha
+    close(self):
+        Libera el grupo de hilos
+    """
+
+    def __init__(self, client=None, max_concurrency=8, timeout=5.0, prov='EC-P'):
+        """
+        Se construye todos los atributos necesarios para el objeto AsyncHolidayResolver.
+        """
+        import asyncio
+        
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.prov = prov
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = {}
+        self._executor = None
+
+
+    @staticmethod
+    def _offline(date, prov):
+        """Consulta la fecha en el calendario fuera de línea de la provincia"""
+        day = datetime.date.fromisoformat(date)
+        return day.toordinal() in holiday_cache.get(prov, day.year)
+
+
+    async def _lookup(self, date):
+        """
+        Consulta una fecha en la API con concurrencia acotada; devuelve (feriado, en_cache)
+        o None si la API no responde a tiempo, para que cada solicitante use el calendario
+        de su provincia
+        """
+        import asyncio
+        import requests
+        
+        from concurrent.futures import ThreadPoolExecutor
+
+        client = self.client or online_client()
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_concurrency, thread_name_prefix='holiday-api')
+        await self._semaphore.acquire()
+        try:
+            future = loop.run_in_executor(self._executor, client.lookup, date)
+        except BaseException:
+            self._semaphore.release()
+            raise
+        # El lugar se libera cuando termina el hilo, no cuando deja de esperarse su resultado
+        future.add_done_callback(self.__release)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except (asyncio.TimeoutError, requests.ConnectionError, requests.Timeout):
+            return None
+
+
+    def __release(self, future):
+        """Libera el lugar de una consulta terminada, aunque ya nadie espere su resultado"""
+        self._semaphore.release()
+        if not future.cancelled():
+            # Marca como leída la excepción de una consulta abandonada por tiempo límite
+            future.exception()
+
+
+    async def lookup(self, date, prov=None):
+        """
+        Consulta si la fecha es un día festivo en Ecuador e indica si la respuesta salió de la cache
+
+        Parámetros
+        ----------
+        date: str
+            Está siguiendo el formato ISO 8601 AAAA-MM-DD: por ejemplo, 2020-04-22
+        prov: str, opcional
+            código de provincia según ISO3166-2 del calendario de respaldo (por defecto self.prov)
+        Devoluciones
+        -------
+        Devuelve una tupla (feriado, en_cache); una respuesta del calendario de respaldo no cuenta como en cache
+        """
+        import asyncio
+        
+        task = self._in_flight.get(date)
+        if task is None:
+            task = asyncio.ensure_future(self._lookup(date))
+            self._in_flight[date] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(date, None))
+        # shield evita que cancelar a un solicitante cancele la consulta compartida
+        result = await asyncio.shield(task)
+        if result is None:
+            return self._offline(date, self.prov if prov is None else prov), False
+        return result
+
+
+    async def is_holiday(self, date, prov=None):
+        """
+        Comprueba si la fecha es un día festivo en Ecuador
+
+        Parámetros
+        ----------
+        date: str
+            Está siguiendo el formato ISO 8601 AAAA-MM-DD: por ejemplo, 2020-04-22
+        prov: str, opcional
+            código de provincia según ISO3166-2 del calendario de respaldo (por defecto self.prov)
+        Devoluciones
+        -------
+        Devuelve Verdadero (True) si la fecha es un dia festivo en Ecuador, caso contrario, sera Falso (False)
+        """
+        return (await self.lookup(date, prov))[0]
+
+
+    def close(self):
+        """Libera el grupo de hilos sin esperar a las consultas que siguen en curso"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Un resolvedor compartido por bucle de eventos, ya que sus primitivas asyncio pertenecen a un bucle
+_async_resolvers = weakref.WeakKeyDictionary()
+
+
+def async_resolver():
+    """
+    Devuelve el AsyncHolidayResolver compartido del bucle de eventos en ejecución, creándolo al primer uso
+    """
+    import asyncio
+    
+    loop = asyncio.get_running_loop()
+    resolver = _async_resolvers.get(loop)
+    if resolver is None:
+        resolver = _async_resolvers[loop] = AsyncHolidayResolver()
+    return resolver
+
+# Zona horaria de Quito (UTC-5, sin horario de verano), usada para marcas de tiempo Unix
+QUITO_TZ = datetime.timezone(datetime.timedelta(hours=-5), 'ECT')
+
+# Días de la semana como aparecen en los archivos de reglas; toordinal() == 1 (0001-01-01) fue lunes
+WEEKDAYS = ("Lunes", "Martes", "Miercoles", "Jueves", "Viernes", "Sabado", "Domingo")
+
+# Clase de placa (PlateQuery.letter) de las placas de dos letras; las de tres letras usan
+# 0 a 25 según su segunda letra
+SHORT_PLATE = 26
+
+# Reglas de la ORDENANZA METROPOLITANA No. 0305, vigentes cuando no se carga otro archivo.
+# Un archivo de reglas es un JSON con esta misma forma; since/until son fechas AAAA-MM-DD
+# (ambas incluidas) o null, y hours son intervalos HH:MM con ambos extremos incluidos
+DEFAULT_RESTRICTIONS = {
+    "rule_sets": [
+        {
+            "name": "Ordenanza Metropolitana 0305",
+            "since": None,
+            "until": None,
+            "days": {"Lunes": [1, 2], "Martes": [3, 4], "Miercoles": [5, 6], "Jueves": [7, 8],
+                     "Viernes": [9, 0], "Sabado": [], "Domingo": []},
+            "hours": [["07:00", "09:30"], ["16:00", "19:30"]],
+            "exempt_letters": "AUZEXM",
+            "exempt_short": True,
+        },
+    ],
+}
+
+
+class RestrictionRules:
+    """
+    Un conjunto de reglas de Pico y Placa con su rango de vigencia, compilado al crearlo en
+    estructuras de consulta directa para que predict no interprete la configuración: una
+    máscara de bits de dígitos restringidos por día de la semana, un byte por minuto del día
+    y una máscara de bits de las clases de placa exentas.
+    ...
+    Atributos
+    ----------
+    name: str
+        nombre de la ordenanza o del conjunto de reglas
+    first: int o None
+        ordinal (datetime.date.toordinal) del primer día de vigencia, o None si no tiene inicio
+    last: int o None
+        ordinal del último día de vigencia (incluido), o None si no tiene fin
+    digits: tuple de int
+        por día de la semana (lunes = 0), máscara de bits de los últimos dígitos restringidos
+    minutes: bytes
+        1440 bytes, uno por minuto del día, que valen 1 en los minutos restringidos
+    windows: tuple de tuplas (int, int)
+        intervalos restringidos en minutos del día (inicio, fin), ambos extremos incluidos,
+        ordenados y sin solapamientos
+    exempt: int
+        máscara de bits de las clases de placa exentas (ver PlateQuery.letter)
+    Metodos
+    -------
+    from_dict(data):
+        Construye las reglas desde un diccionario como los de DEFAULT_RESTRICTIONS
+    to_dict(self):
+        Devuelve las reglas como diccionario serializable en JSON
+    covers(self, ordinal):
+        Devuelve True si las reglas están vigentes en un día
+    restricted_digits(self, ordinal):
+        Devuelve el conjunto de últimos dígitos restringidos en un día
+    """
+    __time_re = re.compile('^([01][0-9]|2[0-3]):[0-5][0-9]$')
+    __minutes = 24 * 60
+
+    def __init__(self, name, first=None, last=None, days=None, hours=(), exempt_letters='', exempt_short=False):
+        """
+        Se construye todos los atributos necesarios para el objeto RestrictionRules.
+
+        Parámetros
+        ----------
+        name: str
+            nombre del conjunto de reglas
+        first, last: int o None, opcional
+            ordinales del primer y último día de vigencia (None si el rango está abierto)
+        days: dict, opcional
+            diccionario {día de WEEKDAYS: lista de últimos dígitos restringidos}
+        hours: iterable de tuplas (int, int), opcional
+            intervalos restringidos en minutos del día, ambos extremos incluidos
+        exempt_letters: str, opcional
+            segundas letras de la placa exentas de la restricción
+        exempt_short: bool, opcional
+            si las placas de dos letras están exentas
+        Aumenta
+        ------
+        ValorError
+            Si algún día, dígito, intervalo o letra no es válido
+        """
+        if first is not None and last is not None and last < first:
+            raise ValueError('Reglas {}: la fecha final debe ser mayor o igual a la inicial'.format(name))
+        self.name = name
+        self.first = first
+        self.last = last
+        days = days or {}
+        unknown = set(days) - set(WEEKDAYS)
+        if unknown:
+            raise ValueError('Reglas {}: días desconocidos {}'.format(name, sorted(unknown)))
+        digits = []
+        for day in WEEKDAYS:
+            mask = 0
+            for digit in days.get(day, ()):
+                if not isinstance(digit, int) or not 0 <= digit <= 9:
+                    raise ValueError('Reglas {}: dígito no válido {!r}'.format(name, digit))
+                mask |= 1 << digit
+            digits.append(mask)
+        self.digits = tuple(digits)
+        minutes = bytearray(self.__minutes)
+        for start, end in hours:
+            if not 0 <= start <= end < self.__minutes:
+                raise ValueError('Reglas {}: intervalo de horas no válido'.format(name))
+            minutes[start:end + 1] = b'\x01' * (end - start + 1)
+        self.minutes = bytes(minutes)
+        # Intervalos normalizados a partir de la máscara, así quedan ordenados y unidos
+        windows = []
+        for minute, restricted in enumerate(self.minutes):
+            if restricted and windows and windows[-1][1] == minute - 1:
+                windows[-1][1] = minute
+            elif restricted:
+                windows.append([minute, minute])
+        self.windows = tuple((start, end) for start, end in windows)
+        exempt = 0
+        for letter in exempt_letters:
+            if not 'A' <= letter <= 'Z':
+                raise ValueError('Reglas {}: letra exenta no válida {!r}'.format(name, letter))
+            exempt |= 1 << (ord(letter) - 65)
+        if exempt_short:
+            exempt |= 1 << SHORT_PLATE
+        self.exempt = exempt
+
+
+    def __repr__(self):
+        return 'RestrictionRules(name={!r}, first={}, last={})'.format(self.name, self.first, self.last)
+
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Construye las reglas desde un diccionario como los de DEFAULT_RESTRICTIONS
+
+        Parámetros
+        ----------
+        data: dict
+            diccionario con name, since, until, days, hours, exempt_letters y exempt_short
+        Devoluciones
+        -------
+        Devuelve un objeto RestrictionRules
+        Aumenta
+        ------
+        ValorError
+            Si el diccionario no describe reglas válidas
+        """
+        try:
+            name = str(data.get('name', ''))
+            first, last = (None if data.get(key) is None else datetime.date.fromisoformat(data[key]).toordinal()
+                           for key in ('since', 'until'))
+            hours = []
+            for start, end in data.get('hours', ()):
+                if not cls.__time_re.match(start) or not cls.__time_re.match(end):
+                    raise ValueError('Reglas {}: las horas deben tener el formato HH:MM'.format(name))
+                hours.append((int(start[:2]) * 60 + int(start[3:]), int(end[:2]) * 60 + int(end[3:])))
+            return cls(name, first, last, data.get('days'), hours, data.get('exempt_letters', ''),
+                       bool(data.get('exempt_short', False)))
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ValueError('Reglas de restricción no válidas: {}'.format(e)) from None
+
+
+    def to_dict(self):
+        """Devuelve las reglas como diccionario serializable en JSON, de la misma forma que from_dict"""
+        def day(ordinal):
+            return None if ordinal is None else datetime.date.fromordinal(ordinal).isoformat()
+
+        return {
+            'name': self.name,
+            'since': day(self.first),
+            'until': day(self.last),
+            'days': {name: [digit for digit in range(10) if mask >> digit & 1]
+                     for name, mask in zip(WEEKDAYS, self.digits)},
+            'hours': [['{:02d}:{:02d}'.format(*divmod(start, 60)), '{:02d}:{:02d}'.format(*divmod(end, 60))]
+                      for start, end in self.windows],
+            'exempt_letters': ''.join(chr(65 + i) for i in range(26) if self.exempt >> i & 1),
+            'exempt_short': bool(self.exempt >> SHORT_PLATE & 1),
+        }
+
+
+    def covers(self, ordinal):
+        """Devuelve True si las reglas están vigentes en el día (ordinal)"""
+        return (self.first is None or self.first <= ordinal) and (self.last is None or ordinal <= self.last)
+
+
+    def restricted_digits(self, ordinal):
+        """Devuelve el frozenset de últimos dígitos restringidos el día (ordinal), sin considerar feriados"""
+        mask = self.digits[(ordinal - 1) % 7]
+        return frozenset(digit for digit in range(10) if mask >> digit & 1)
+
+
+# Reglas que se aplican en los días que no cubre ningún conjunto de reglas
+UNRESTRICTED = RestrictionRules('Sin restricción')
+
+
+class RestrictionSchedule:
+    """
+    Secuencia de RestrictionRules sin solapamientos, ordenada por fecha de inicio, que
+    encuentra con una búsqueda binaria las reglas vigentes en un día; los días que no cubre
+    ninguna usan UNRESTRICTED. Es inmutable: para cambiar de reglas se construye otra y se
+    publica con load_restrictions.
+    ...
+    Atributos
+    ----------
+    rule_sets: tuple de RestrictionRules
+        conjuntos de reglas ordenados por fecha de inicio
+    fingerprint: int
+        CRC-32 de las reglas en JSON canónico, para reconocer tablas compiladas con otras reglas
+    Metodos
+    -------
+    from_dict(data):
+        Construye la secuencia desde un diccionario {"rule_sets": [...]}
+    load(path):
+        Carga la secuencia desde un archivo JSON
+    to_dict(self):
+        Devuelve la secuencia como diccionario serializable en JSON
+    at(self, ordinal):
+        Devuelve las reglas vigentes en un día
+    index(self, ordinals):
+        Devuelve, para un numpy.ndarray de días, la posición de sus reglas en arrays()
+    arrays(self):
+        Devuelve las reglas como arreglos de NumPy para las evaluaciones por lotes
+    """
+
+    def __init__(self, rule_sets):
+        """
+        Se construye todos los atributos necesarios para el objeto RestrictionSchedule.
+
+        Parámetros
+        ----------
+        rule_sets: iterable de RestrictionRules
+            conjuntos de reglas, en cualquier orden
+        Aumenta
+        ------
+        ValorError
+            Si dos conjuntos de reglas se solapan
+        """
+        self.rule_sets = tuple(sorted(rule_sets, key=lambda rules: rules.first or 0))
+        for previous, rules in zip(self.rule_sets, self.rule_sets[1:]):
+            if previous.last is None or rules.first is None or previous.last >= rules.first:
+                raise ValueError('Las reglas {} y {} se solapan'.format(previous.name, rules.name))
+        # Los ordinales empiezan en 1, así que 0 representa un inicio abierto
+        self._starts = [rules.first or 0 for rules in self.rule_sets]
+        self.fingerprint = zlib.crc32(json.dumps(self.to_dict(), sort_keys=True).encode('utf-8'))
+        self._arrays = None
+
+
+    @classmethod
+    def from_dict(cls, data):
+        """Construye la secuencia desde un diccionario {"rule_sets": [...]} (ver DEFAULT_RESTRICTIONS)"""
+        if not isinstance(data, dict) or not isinstance(data.get('rule_sets'), list):
+            raise ValueError('Las reglas de restricción deben tener una lista "rule_sets"')
+        return cls(RestrictionRules.from_dict(rules) for rules in data['rule_sets'])
+
+
+    @classmethod
+    def load(cls, path):
+        """
+        Carga y compila la secuencia de reglas de un archivo JSON
+
+        Parámetros
+        ----------
+        path: str
+            archivo de reglas
+        Devoluciones
+        -------
+        Devuelve un objeto RestrictionSchedule
+        Aumenta
+        ------
+        ValorError
+            Si el archivo no contiene reglas válidas
+        """
+        with open(path, encoding='utf-8') as f:
+            try:
+                data = json.load(f)
+            except ValueError as e:
+                raise ValueError('El archivo {} no es un JSON válido: {}'.format(path, e)) from None
+        return cls.from_dict(data)
+
+
+    def to_dict(self):
+        """Devuelve la secuencia como diccionario serializable en JSON"""
+        return {'rule_sets': [rules.to_dict() for rules in self.rule_sets]}
+
+
+    def at(self, ordinal):
+        """
+        Devuelve las RestrictionRules vigentes el día (ordinal), o UNRESTRICTED si ninguna lo cubre
+        """
+        i = bisect.bisect_right(self._starts, ordinal) - 1
+        if i >= 0:
+            rules = self.rule_sets[i]
+            if rules.last is None or ordinal <= rules.last:
+                return rules
+        return UNRESTRICTED
+
+
+    def index(self, ordinals):
+        """
+        Devuelve un numpy.ndarray con la posición en arrays() de las reglas vigentes en cada
+        día de ordinals; la última posición, len(rule_sets), corresponde a UNRESTRICTED
+        """
+        import numpy as np
+
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        n = len(self.rule_sets)
+        if n == 0:
+            return np.zeros(ordinals.shape, dtype=np.intp)
+        lasts = np.array([rules.last if rules.last is not None else 1 << 62 for rules in self.rule_sets])
+        i = np.searchsorted(np.array(self._starts), ordinals, side='right') - 1
+        j = np.maximum(i, 0)
+        return np.where((i >= 0) & (ordinals <= lasts[j]), j, n)
+
+
+    def arrays(self):
+        """
+        Devuelve una tupla (minute_masks, digit_tables, exempt_tables) de numpy.ndarray booleanos
+        de formas (k, 1440), (k, 7, 10) y (k, 27), con una fila por conjunto de reglas y una
+        última para UNRESTRICTED; se compilan una sola vez por secuencia
+        """
+        import numpy as np
+
+        if self._arrays is None:
+            rule_sets = self.rule_sets + (UNRESTRICTED,)
+            minute_masks = np.array([np.frombuffer(rules.minutes, dtype=np.uint8) for rules in rule_sets]) != 0
+            digit_tables = np.array([[[mask >> digit & 1 for digit in range(10)] for mask in rules.digits]
+                                     for rules in rule_sets], dtype=bool)
+            exempt_tables = np.array([[rules.exempt >> letter & 1 for letter in range(SHORT_PLATE + 1)]
+                                      for rules in rule_sets], dtype=bool)
+            self._arrays = (minute_masks, digit_tables, exempt_tables)
+        return self._arrays
+
+
+# Reglas de Pico y Placa vigentes. Se reemplazan con una sola asignación (load_restrictions):
+# cada predicción lee la referencia una vez, así que las que están en curso terminan con las
+# reglas anteriores y las siguientes ven las nuevas, sin bloqueos
+_restrictions = RestrictionSchedule.from_dict(DEFAULT_RESTRICTIONS)
+
+
+def restrictions():
+    """Devuelve la RestrictionSchedule vigente"""
+    return _restrictions
+
+
+def load_restrictions(source):
+    """
+    Compila un nuevo conjunto de reglas de Pico y Placa y lo publica de forma atómica
+
+    Parámetros
+    ----------
+    source: str, dict o RestrictionSchedule
+        archivo JSON de reglas, diccionario como DEFAULT_RESTRICTIONS o secuencia ya compilada
+    Devoluciones
+    -------
+    Devuelve la RestrictionSchedule publicada
+    Aumenta
+    ------
+    ValorError
+        Si las reglas no son válidas; en ese caso siguen vigentes las anteriores
+    """
+    global _restrictions
+    if isinstance(source, RestrictionSchedule):
+        schedule = source
+    elif isinstance(source, dict):
+        schedule = RestrictionSchedule.from_dict(source)
+    else:
+        schedule = RestrictionSchedule.load(source)
+    _restrictions = schedule
+    return schedule
+
+
+class RestrictionWatcher:
+    """
+    Hilo que vigila la fecha de modificación de un archivo de reglas y lo vuelve a cargar con
+    load_restrictions cuando cambia, para que un servicio en ejecución cambie de reglas sin
+    reiniciarse. Si el archivo nuevo no es válido siguen vigentes las reglas anteriores.
+    ...
+    Atributos
+    ----------
+    path: str
+        archivo de reglas vigilado
+    interval: float
+        segundos entre comprobaciones
+    error: Exception o None
+        último error de carga, o None si la última carga fue correcta
+    Metodos
+    -------
+    check(self):
+        Vuelve a cargar el archivo si cambió desde la última comprobación
+    start(self):
+        Inicia el hilo de vigilancia
+    stop(self):
+        Detiene el hilo de vigilancia
+    """
+
+    def __init__(self, path, interval=2.0):
+        """
+        Se construye todos los atributos necesarios para el objeto RestrictionWatcher; la
+        versión actual del archivo se considera ya cargada.
+        """
+        self.path = path
+        self.interval = interval
+        self.error = None
+        self._mtime = self.__mtime()
+        self._stop = threading.Event()
+        self._thread = None
+
+
+    def __mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+
+    def check(self):
+        """
+        Vuelve a cargar el archivo si su fecha de modificación cambió
+
+        Devoluciones
+        -------
+        Devuelve True si se publicaron reglas nuevas, de lo contrario False
+        """
+        mtime = self.__mtime()
+        if mtime is None or mtime == self._mtime:
+            return False
+        # Un archivo no válido no se vuelve a intentar hasta que cambie otra vez
+        self._mtime = mtime
+        try:
+            load_restrictions(self.path)
+        except (OSError, ValueError) as e:
+            self.error = e
+            print('No se pudieron recargar las reglas de {}: {}'.format(self.path, e), file=sys.stderr)
+            return False
+        self.error = None
+        return True
+
+
+    def start(self):
+        """Inicia el hilo de vigilancia (en segundo plano, no impide terminar el proceso)"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='restriction-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+
+    def stop(self):
+        """Detiene el hilo de vigilancia"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+
+
+class PlateQuery:
+    """
+    Representación compacta de una consulta de Pico y Placa ya interpretada: todos los
+    campos son enteros o booleanos, de modo que predict no vuelve a analizar cadenas.
+    ...
+    Atributos
+    ----------
+    letter: int
+        clase de la placa para las exenciones: su segunda letra (0 a 25) o SHORT_PLATE si
+        tiene sólo dos letras
+    digit: int
+        último dígito de la placa
+    ordinal: int
+        fecha como datetime.date.toordinal()
+    year: int
+        año de la fecha
+    minute: int
+        minuto del día (0 a 1439)
+    """
+    __slots__ = ('letter', 'digit', 'ordinal', 'year', 'minute')
+
+    def __init__(self, letter=None, digit=None, ordinal=None, year=None, minute=None):
+        """
+        Se construye todos los atributos necesarios para el objeto PlateQuery.
+        """
+        self.letter = letter
+        self.digit = digit
+        self.ordinal = ordinal
+        self.year = year
+        self.minute = minute
+
+
+    @property
+    def exempt(self):
+        """Devuelve True si la placa está exenta según las reglas vigentes en la fecha de la consulta"""
+        return _restrictions.at(self.ordinal).exempt >> self.letter & 1 == 1
+
+
+    def __repr__(self):
+        return 'PlateQuery(letter={}, digit={}, ordinal={}, year={}, minute={})'.format(
+            self.letter, self.digit, self.ordinal, self.year, self.minute)
+
+
+class PredictMetrics:
+    """
+    Métricas de PicoPlaca.predict: cuántos veredictos decide cada etapa (tabla de decisión,
+    feriado, exención por placa, hora fuera de las horas pico, dígito restringido por día)
+    e histogramas de latencia de la consulta de feriados por origen (offline/online) y por
+    acierto o fallo de la cache. Se exportan como JSON o en el formato de texto de Prometheus.
+    ...
+    Atributos
+    ----------
+    buckets: tuple de float
+        límites superiores en segundos de los histogramas de latencia
+    Metodos
+    -------
+    count(self, stage, allowed):
+        Registra un veredicto decidido por una etapa
+    observe_holiday(self, source, cached, seconds):
+        Registra la latencia de una consulta de feriados
+    snapshot(self):
+        Devuelve una copia de las métricas como diccionario
+    to_json(self):
+        Devuelve las métricas como texto JSON
+    to_prometheus(self):
+        Devuelve las métricas en el formato de texto de Prometheus
+    """
+    DEFAULT_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3,
+                       1e-2, 0.1, 0.5, 1.0, 5.0)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Se construye todos los atributos necesarios para el objeto PredictMetrics.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._verdicts = {}
+        self._histograms = {}
+
+
+    def count(self, stage, allowed):
+        """Registra un veredicto decidido por una etapa"""
+        key = (stage, allowed)
+        with self._lock:
+            self._verdicts[key] = self._verdicts.get(key, 0) + 1
+
+
+    def observe_holiday(self, source, cached, seconds):
+        """
+        Registra la latencia de una consulta de feriados
+
+        Parámetros
+        ----------
+        source: str
+            'offline' u 'online'
+        cached: bool
+            True si el calendario o la respuesta ya estaban en la cache
+        seconds: float
+            duración de la consulta
+        """
+        key = (source, 'hit' if cached else 'miss')
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0}
+            histogram['counts'][bisect.bisect_left(self.buckets, seconds)] += 1
+            histogram['sum'] += seconds
+
+
+    def snapshot(self):
+        """
+        Devuelve una copia de las métricas como diccionario con verdicts
+        [{stage, allowed, count}] y holiday_lookup [{source, cache, buckets, counts, count, sum}]
+        """
+        with self._lock:
+            verdicts = [{'stage': stage, 'allowed': allowed, 'count': n}
+                        for (stage, allowed), n in sorted(self._verdicts.items())]
+            histograms = [{'source': source, 'cache': cache, 'buckets': list(self.buckets),
+                           'counts': list(h['counts']), 'count': sum(h['counts']), 'sum': h['sum']}
+                          for (source, cache), h in sorted(self._histograms.items())]
+        return {'verdicts': verdicts, 'holiday_lookup': histograms}
+
+
+    def to_json(self):
+        """Devuelve las métricas como texto JSON"""
+        return json.dumps(self.snapshot())
+
+
+    def to_prometheus(self):
+        """Devuelve las métricas en el formato de texto de exposición de Prometheus"""
+        data = self.snapshot()
+        lines = ['# HELP picoplaca_verdicts_total Veredictos de predict por etapa decisiva',
+                 '# TYPE picoplaca_verdicts_total counter']
+        for v in data['verdicts']:
+            lines.append('picoplaca_verdicts_total{{stage="{}",allowed="{}"}} {}'.format(
+                v['stage'], str(v['allowed']).lower(), v['count']))
+        lines += ['# HELP picoplaca_holiday_lookup_seconds Latencia de la consulta de feriados',
+                  '# TYPE picoplaca_holiday_lookup_seconds histogram']
+        for h in data['holiday_lookup']:
+            labels = 'source="{}",cache="{}"'.format(h['source'], h['cache'])
+            cumulative = 0
+            for bound, n in zip(h['buckets'] + ['+Inf'], h['counts']):
+                cumulative += n
+                lines.append('picoplaca_holiday_lookup_seconds_bucket{{{},le="{}"}} {}'.format(
+                    labels, bound if bound == '+Inf' else repr(float(bound)), cumulative))
+            lines.append('picoplaca_holiday_lookup_seconds_sum{{{}}} {!r}'.format(labels, h['sum']))
+            lines.append('picoplaca_holiday_lookup_seconds_count{{{}}} {}'.format(labels, h['count']))
+        return '\n'.join(lines) + '\n'
+
+
+# Métricas activas; con None, PicoPlaca.predict no está instrumentado y no tiene ningún costo adicional
+_metrics = None
+
+
+def enable_metrics(metrics=None):
+    """
+    Activa la instrumentación de PicoPlaca.predict reemplazándolo por la versión instrumentada;
+    PicoPlaca.predict_async registra en las mismas métricas mientras estén activas
+
+    Parámetros
+    ----------
+    metrics: PredictMetrics, opcional
+        métricas donde registrar (por defecto unas nuevas)
+    Devoluciones
+    -------
+    Devuelve el objeto PredictMetrics activo
+    """
+    global _metrics
+    _metrics = metrics if metrics is not None else PredictMetrics()
+    PicoPlaca.predict = PicoPlaca._predict_instrumented
+    return _metrics
+
+
+def disable_metrics():
+    """Desactiva la instrumentación y restaura PicoPlaca.predict sin ningún costo adicional"""
+    global _metrics
+    PicoPlaca.predict = PicoPlaca._predict_plain
+    _metrics = None
+
+
+def current_metrics():
+    """Devuelve el objeto PredictMetrics activo o None si la instrumentación está desactivada"""
+    return _metrics
+
+
+class PicoPlaca:
+    """
+   La clase que representara vehículo.
+    medida de restricción (Pico y Placa) 
+    - ORDENANZA METROPOLITANA No. 0305
+    http://www7.quito.gob.ec/mdmq_ordenanzas/Ordenanzas/ORDENANZAS%20A%C3%91OS%20ANTERIORES/ORDM-305-%20%20CIRCULACION%20VEHICULAR%20PICO%20Y%20PLACA.pdf
+    ...
+    Atributos
+    ----------
+    plate : str 
+        El registro o patente de un vehículo es una combinación de caracteres alfabéticos o numéricos 
+        caracteres que identifican e individualizan el vehículo respecto de los demás;
+        
+        El formato utilizado es
+        XX-YYYY or XXX-YYYY, 
+        donde X es una letra mayúscula e Y es un dígito.
+    fecha: calle
+        Fecha en la que el vehículo pretende transitar
+        esta siguiendo el
+        Formato ISO 8601 AAAA-MM-DD: por ejemplo, 2020-04-22.
+    tiempo: calle
+        tiempo en que el vehículo pretende transitar
+        esta siguiendo el formato
+        HH:MM: por ejemplo, 08:35, 19:30
+    en línea: booleano, opcional
+        si en línea == Verdadero, se utilizará la API de días festivos abstractos
+    prov: str
+        código de provincia según ISO3166-2 del calendario de feriados fuera de línea
+    Métodos
+    -------
+    __init__(self, plate, date, time, online=False, prov='EC-P'):
+        Construye lo necesario para los atributos mencionados.
+        para que el objeto PicoPlaca.
+    plato (asi mismo):
+        Obtiene el valor de placa como atributo
+    placa (automovil, valor):
+        Establece el atributo valor de placa
+    fecha (uno mismo):
+        Obtiene el atributo de fecha como valor
+    fecha (auto, valor):
+        Se establece el valor del atributo de fecha
+    tiempo (asi mismo):
+        Obtiene el valor del atributo de tiempo
+    tiempo (asi mismo, valor):
+        Establece el valor del atributo de tiempo
+    __es_vacaciones:
+        Devuelve True si la fecha marcada (en formato ISO 8601 AAAA-MM-DD) es un día festivo en Ecuador, de lo contrario, False
+    predecir (auto):
+        Devuelve True si el vehículo con la placa especificada puede estar en la carretera en la fecha y hora especificadas, de lo contrario, False,
+        según las reglas de restricción vigentes en esa fecha (ver load_restrictions)
+    warm_up(first_year, last_year, prov='EC-P'):
+        Precarga en la cache compartida los calendarios de feriados de un rango de años
+    use_decision_table(table):
+        Hace que predict fuera de línea lea una tabla de decisión precompilada
+    next_allowed(self, after=None):
+        Devuelve el siguiente instante en que el vehículo puede circular
+    circulation_windows(self, start_date, end_date):
+        Devuelve los intervalos permitidos y prohibidos del vehículo en un rango de fechas
+    predict_many(plates, dates, times, prov='EC-P'):
+        Evalúa por lotes, con operaciones vectorizadas de NumPy, muchas placas, fechas y horas a la vez
+    predict_parallel(plates, dates, times, workers=None, chunksize=100000, prov='EC-P'):
+        Reparte un lote grande en bloques evaluados con predict_many en varios procesos
+    predict_async(self, resolver=None):
+        Variante asíncrona de predict para servicios basados en asyncio
+    predict_many_async(plates, dates, times, online=False, resolver=None, prov='EC-P'):
+        Evalúa muchos registros de forma asíncrona y concurrente
+    """ 
+    # Los días y dígitos restringidos, las horas pico y las letras exentas no son atributos de la
+    # clase: se leen de las reglas vigentes en cada fecha (RestrictionSchedule, load_restrictions)
+
+    # Formatos de placa, fecha y hora
+    __plate_re = re.compile('^[A-Z]{2,3}-[0-9]{4}$')
+    __date_re = re.compile('^[0-9]{4}-[0-9]{2}-[0-9]{2}$')
+    __time_re = re.compile('^([01][0-9]|2[0-3]):[0-5][0-9]$')
+
+    # Tabla de decisión precompilada usada por predict fuera de línea (ver use_decision_table)
+    _decision_table = None
+
+    # Mensajes de error de validación
+    __plate_error = 'La placa debe tener el siguiente formato: XX-YYYY o XXX-YYYY, donde X es una letra mayúscula e Y es un dígito'
+    __date_error = 'La fecha debe tener el formato correspondiente: AAAA-MM-DD (por ejemplo: 2021-04-02)'
+    __time_error = 'La hora debe tener el siguiente formato de aparicion: HH:MM (por ejemplo, 08:31, 14:22, 00:01)'
+
+    def __init__(self, plate, date, time, online=False, prov='EC-P'):
+        """
+       Se construye todos los atributos que son necesarios para el objeto o clase PicoPlaca.
+        
+        Parameteros
+        ----------
+            placa : calle
+                El registro o patente de un vehículo es una combinación de caracteres alfabéticos o numéricos
+                caracteres que identifican e individualizan el vehículo respecto de los demás;
+                El formato utilizado es AA-YYYY o XXX-YYYY, donde X es una letra mayúscula e Y es un dígito.
+            fecha: calle
+                Fecha en la que el vehículo pretende transitar
+                Sigue el formato ISO 8601 AAAA-MM-DD: por ejemplo, 2020-04-22.
+            tiempo: calle
+                tiempo en que el vehículo pretende transitar
+                Sigue el formato HH:MM: por ejemplo, 08:35, 19:30
+            en línea: booleano, opcional
+                si en línea == Verdadero, se usará la API de días festivos abstractos (el valor predeterminado es Falso)               
+            prov: str, opcional
+                código de provincia según ISO3166-2 cuyo calendario de feriados se usa fuera de línea
+                (el valor predeterminado es "EC-P", Pichincha)
+        """                
+        self._query = PlateQuery()
+        self.plate = plate
+        self.date = date
+        self.time = time
+        self.online = online
+        self.prov = prov
+
+
+    @property
+    def prov(self):
+        """Obtiene el valor del atributo de provincia"""
+        return self._prov
+
+
+    @prov.setter
+    def prov(self, value):
+        """
+        Establece el valor del atributo de provincia; cambiarla no reconstruye calendarios,
+        que se comparten por (provincia, año) en la cache
+
+        Aumenta
+        ------
+        ValorError
+            Si el valor no es un código de provincia ISO3166-2 de Ecuador
+        """
+        if value not in PROVINCES:
+            raise ValueError('La provincia debe ser un código ISO 3166-2 de Ecuador, por ejemplo: EC-P')
+        self._prov = value
+
+
+    @property
+    def plate(self):
+        """Obtiene el valor del atributo de placa"""
+        return self._plate
+
+
+    @plate.setter
+    def plate(self, value):
+        """
+       Establece el valor del atributo de la placa
+        Parameteros
+        ----------
+        Valor: str
+        
+        Aumenta
+        ------
+        ValorError
+            Si la cadena de valor no tiene el correspondiente formato que es
+            XX-YYYY o XXX-YYYY,
+            donde X es una letra mayúscula e Y es un dígito
+        """
+        if not isinstance(value, str) or not self.__plate_re.match(value):
+            raise ValueError(self.__plate_error)
+        self._plate = value
+        self._query.letter = self._plate_letter(value)
+        self._query.digit = ord(value[-1]) - 48
+
+
+    @property
+    def date(self):
+        """Obtiene el valor del atributo de fecha"""
+        return self._date
+
+
+    @date.setter
+    def date(self, value):
+        """
+        Establece el valor del atributo de fecha
+        Parameteros
+        ----------
+        Valor : str, datetime.date o número
+            fecha en formato AAAA-MM-DD, un datetime.date/datetime.datetime o una
+            marca de tiempo Unix (segundos) que se interpreta en la hora de Quito
+        
+        Aumenta
+        ------
+        ValorError
+            Si la cadena de valor no tiene el formato AAAA-MM-DD (por ejemplo, 2021-04-02)
+        """
+        if isinstance(value, datetime.datetime):
+            day = value.date()
+        elif isinstance(value, datetime.date):
+            day = value
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            day = datetime.datetime.fromtimestamp(value, QUITO_TZ).date()
+        else:
+            try:
+                if not self.__date_re.match(value):
+                    raise ValueError
+                day = datetime.date(int(value[:4]), int(value[5:7]), int(value[8:]))
+            except (TypeError, ValueError):
+                raise ValueError(self.__date_error) from None
+        self._date = day.isoformat()
+        self._query.ordinal = day.toordinal()
+        self._query.year = day.year
+        
+
+    @property
+    def time(self):
+        """Obtiene el valor del atributo de tiempo"""
+        return self._time
+
+
+    @time.setter
+    def time(self, value):
+        """
+        Establece el valor de un atributo de tiempo
+        Parameteros
+        ----------
+        Valor: str, datetime.time o número
+            hora en formato HH:MM, un datetime.time/datetime.datetime o una marca de
+            tiempo Unix (segundos) que se interpreta en la hora de Quito
+        
+        Aumenta
+        ------
+        ValorError
+           Si la cadena de caracter que fue asignada no tiene el formato HH:MM (e.g., 08:31, 14:22, 00:01)
+        """
+        if isinstance(value, datetime.datetime):
+            minute = value.hour * 60 + value.minute
+        elif isinstance(value, datetime.time):
+            minute = value.hour * 60 + value.minute
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            t = datetime.datetime.fromtimestamp(value, QUITO_TZ)
+            minute = t.hour * 60 + t.minute
+        else:
+            if not isinstance(value, str) or not self.__time_re.match(value):
+                raise ValueError(self.__time_error)
+            minute = int(value[:2]) * 60 + int(value[3:])
+        self._time = '{:02d}:{:02d}'.format(*divmod(minute, 60))
+        self._query.minute = minute
+
+
+    def __is_holiday(self, query, online):
+        """
+        Comprueba si la fecha de la consulta es un día festivo en Ecuador
+        si en línea == Verdadero, utilizará una API REST, de lo contrario, mostrara los días festivos del año encontrados
+        
+        Parámetros
+        ----------
+        query: PlateQuery
+            consulta ya interpretada
+        en línea: booleano, opcional
+            si en línea == Verdadero, se utilizará la API de días festivos abstractos
+        Devoluciones
+        -------
+        Devuelve Verdadero (True) si la fecha marcada (en formato ISO 8601 AAAA-MM-DD) que es un dia festivo en Ecuador, caso contrario, sera Falso(False)
+        """            
+        if online:
+            # API de vacaciones abstractapi, versión gratuita: 1000 solicitudes por mes
+            # 1 solicitud por segundo; el cliente compartido limita la tasa y guarda las respuestas
+            return online_client().is_holiday(self.date)
+        else:
+            return query.ordinal in holiday_cache.get(self.prov, query.year)
+
+
+    @staticmethod
+    def use_decision_table(table):
+        """
+        Hace que predict fuera de línea responda con una tabla de decisión precompilada
+        para las fechas que cubre; None vuelve a usar el calendario y las reglas
+
+        Parámetros
+        ----------
+        table: DecisionTable o None
+            tabla cargada con DecisionTable.load
+        """
+        PicoPlaca._decision_table = table
+
+
+    @staticmethod
+    def warm_up(first_year, last_year, prov='EC-P'):
+        """
+        Precarga en la cache compartida los calendarios de feriados entre dos años (ambos incluidos),
+        para que las primeras predicciones fuera de línea no paguen la construcción del calendario
+
+        Parámetros
+        ----------
+        first_year: int
+            primer año a precargar
+        last_year: int
+            último año a precargar
+        prov: str, opcional
+            código de provincia según ISO3166-2 (el valor predeterminado es "EC-P")
+        """
+        holiday_cache.warm_up(range(first_year, last_year + 1), prov=prov)
+
+
+    @classmethod
+    def predict_many(cls, plates, dates, times, prov='EC-P'):
+        """
+        Comprueba por lotes si los vehículos pueden estar en la carretera, evaluando todas las
+        reglas de Pico y Placa como operaciones sobre arreglos completos de NumPy en lugar
+        de construir un objeto PicoPlaca por registro. Siempre se usa el calendario fuera de línea.
+
+        Parámetros
+        ----------
+        plates: secuencia de str o numpy.ndarray
+            placas en formato XX-YYYY o XXX-YYYY
+        dates: secuencia de str o numpy.ndarray
+            fechas en formato ISO 8601 AAAA-MM-DD
+        times: secuencia de str o numpy.ndarray
+            horas en formato HH:MM
+        prov: str, opcional
+            código de provincia según ISO3166-2 (el valor predeterminado es "EC-P")
+        Devoluciones
+        -------
+        Devuelve un numpy.ndarray booleano donde cada posición es Verdadero (True) si el vehículo
+        correspondiente puede estar en la carretera, de lo contrario Falso (False)
+        Aumenta
+        ------
+        ValorError
+            Si las secuencias no tienen la misma longitud o algún registro no tiene el formato
+            correspondiente; el mensaje indica la posición del primer registro no válido
+        """
+        import numpy as np
+        
+        # Los registros se evalúan aplanados: la cantidad se compara después de aplanar
+        plates, dates, times = (np.asarray(values).reshape(-1) for values in (plates, dates, times))
+        n = len(plates)
+        if len(dates) != n or len(times) != n:
+            raise ValueError('Las placas, fechas y horas deben tener la misma cantidad de registros')
+        if n == 0:
+            return np.zeros(0, dtype=bool)
+
+        # Placas: XXX-YYYY o XX-YYYY
+        parsed = _as_codes(plates, 8)
+        if parsed is None:
+            raise ValueError(cls.__plate_error)
+        codes, lengths = parsed
+        letters = (codes >= ord('A')) & (codes <= ord('Z'))
+        digits = (codes >= ord('0')) & (codes <= ord('9'))
+        dash = codes == ord('-')
+        long_plate = (lengths == 8) & letters[:, :3].all(axis=1) & dash[:, 3] & digits[:, 4:8].all(axis=1)
+        short_plate = (lengths == 7) & letters[:, :2].all(axis=1) & dash[:, 2] & digits[:, 3:7].all(axis=1)
+        valid = long_plate | short_plate
+        if not valid.all():
+            raise ValueError('{} (registro {})'.format(cls.__plate_error, _first_invalid(valid)))
+        last_digit = codes[np.arange(n), lengths - 1].astype(np.int64) - ord('0')
+        letter = np.where(short_plate, SHORT_PLATE, codes[:, 1].astype(np.int64) - ord('A'))
+
+        # Fechas: AAAA-MM-DD
+        parsed = _as_codes(dates, 10)
+        if parsed is None:
+            raise ValueError(cls.__date_error)
+        codes, lengths = parsed
+        digits = (codes >= ord('0')) & (codes <= ord('9'))
+        valid = ((lengths == 10) & (codes[:, 4] == ord('-')) & (codes[:, 7] == ord('-')) &
+                 digits[:, [0, 1, 2, 3, 5, 6, 8, 9]].all(axis=1))
+        if not valid.all():
+            raise ValueError('{} (registro {})'.format(cls.__date_error, _first_invalid(valid)))
+        try:
+            days = np.asarray(dates).reshape(-1).astype('U10').astype('datetime64[D]')
+        except ValueError:
+            raise ValueError(cls.__date_error) from None
+        epoch_days = days.astype(np.int64)
+        # El 1970-01-01 fue jueves (weekday 3)
+        weekday = (epoch_days + 3) % 7
+        years = days.astype('datetime64[Y]').astype(np.int64) + 1970
+
+        # Horas: HH:MM
+        parsed = _as_codes(times, 5)
+        if parsed is None:
+            raise ValueError(cls.__time_error)
+        codes, lengths = parsed
+        values = codes.astype(np.int64) - ord('0')
+        digits = (values >= 0) & (values <= 9)
+        hours = values[:, 0] * 10 + values[:, 1]
+        mins = values[:, 3] * 10 + values[:, 4]
+        valid = ((lengths == 5) & (codes[:, 2] == ord(':')) & digits[:, [0, 1, 3, 4]].all(axis=1) &
+                 (hours <= 23) & (mins <= 59))
+        if not valid.all():
+            raise ValueError('{} (registro {})'.format(cls.__time_error, _first_invalid(valid)))
+        minute = hours * 60 + mins
+
+        # Comprobar si la fecha es un día festivo
+        ordinals = epoch_days + _EPOCH_ORDINAL
+        holiday_ordinals = [o for year in np.unique(years).tolist()
+                            for o in holiday_cache.get(prov, year)]
+        holiday = np.isin(ordinals, np.array(holiday_ordinals, dtype=np.int64))
+
+        # Reglas vigentes en cada fecha, compiladas una vez por secuencia de reglas
+        schedule = _restrictions
+        minute_masks, digit_tables, exempt_tables = schedule.arrays()
+        rules = schedule.index(ordinals)
+
+        # Exención por placa, horas pico restringidas y dígito restringido por día
+        exempt = exempt_tables[rules, letter]
+        forbidden_time = minute_masks[rules, minute]
+
+        return holiday | exempt | ~forbidden_time | ~digit_tables[rules, weekday, last_digit]
+
+
+    @staticmethod
+    def _plate_letter(plate):
+        """
+        Devuelve la clase de una placa (ya validada) para las exenciones: su segunda letra
+        (0 a 25) o SHORT_PLATE si tiene sólo dos letras
+        """
+        return SHORT_PLATE if plate[2] == '-' else ord(plate[1]) - 65
+
+
+    @classmethod
+    def _restricted_digits(cls, ordinal, minute=None, prov='EC-P', schedule=None):
+        """
+        Devuelve el conjunto de últimos dígitos que no pueden circular en un día y minuto,
+        o durante las horas restringidas de ese día si minute es None (vacío en feriados);
+        las placas exentas por las reglas del día pueden circular igualmente. schedule son
+        las reglas leídas por quien llama (por defecto las vigentes)
+        """
+        rules = (_restrictions if schedule is None else schedule).at(ordinal)
+        if not rules.windows or (minute is not None and not rules.minutes[minute]):
+            return frozenset()
+        if ordinal in holiday_cache.get(prov, datetime.date.fromordinal(ordinal).year):
+            return frozenset()
+        return rules.restricted_digits(ordinal)
+
+
+    @classmethod
+    def predict_parallel(cls, plates, dates, times, workers=None, chunksize=100000, prov='EC-P'):
+        """
+        Comprueba por lotes si los vehículos pueden estar en la carretera repartiendo los
+        registros en bloques entre varios procesos. Los calendarios de feriados de los años
+        presentes en el lote se construyen una sola vez y se envían a cada proceso al iniciarlo;
+        cada bloque se evalúa con predict_many.
+
+        Parámetros
+        ----------
+        plates: secuencia de str o numpy.ndarray
+            placas en formato XX-YYYY o XXX-YYYY
+        dates: secuencia de str o numpy.ndarray
+            fechas en formato ISO 8601 AAAA-MM-DD
+        times: secuencia de str o numpy.ndarray
+            horas en formato HH:MM
+        workers: int, opcional
+            número de procesos (el valor predeterminado es la cantidad de núcleos)
+        chunksize: int, opcional
+            número de registros por bloque (el valor predeterminado es 100000)
+        prov: str, opcional
+            código de provincia según ISO3166-2 (el valor predeterminado es "EC-P")
+        Devoluciones
+        -------
+        Devuelve un numpy.ndarray booleano con los veredictos en el mismo orden de la entrada
+        Aumenta
+        ------
+        ValorError
+            Si algún registro no es válido, igual que predict_many
+        """
+        import numpy as np
+        from concurrent.futures import ProcessPoolExecutor
+        
+        if chunksize < 1:
+            raise ValueError('El tamaño de bloque debe ser mayor o igual a 1')
+        plates, dates, times = (np.asarray(values).reshape(-1) for values in (plates, dates, times))
+        n = len(plates)
+        if len(dates) != n or len(times) != n:
+            raise ValueError('Las placas, fechas y horas deben tener la misma cantidad de registros')
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or n <= chunksize:
+            return cls.predict_many(plates, dates, times, prov)
+
+        calendars = {}
+        for year in np.unique(dates.astype('U4')).tolist():
+            if year.isdigit() and int(year) > 0:
+                calendars[(prov, int(year))] = holiday_cache.get(prov, int(year))
+
+        chunks = ((i, plates[i:i + chunksize], dates[i:i + chunksize], times[i:i + chunksize], prov)
+                  for i in range(0, n, chunksize))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                 initargs=(calendars, _restrictions)) as executor:
+            return np.concatenate(list(executor.map(_predict_chunk, chunks)))
+
+
+    def predict(self):
+        """
+        Comprueba si el siguiente vehículo con la placa seleccionada puede estar en la carretera en la fecha y hora proporcionada según el reglamento de Pico y Placa:
+        http://www7.quito.gob.ec/mdmq_ordenanzas/Ordenanzas/ORDENANZAS%20A%C3%91OS%20ANTERIORES/ORDM-305-%20%20CIRCULACION%20VEHICULAR%20PICO%20Y%20PLACA.pdf    
+        Returns
+        -------
+        Returns 
+        Verdadero si el carro con
+        la placa especificada puede estar en el camino
+        en la fecha y hora que se muestra, de lo contrario sera Falso
+        """
+        query = self._query
+        # Las reglas se leen una sola vez, por si load_restrictions las reemplaza durante la consulta
+        schedule = _restrictions
+        table = PicoPlaca._decision_table
+        if table is not None and not self.online and table.usable(self.prov, query.ordinal, schedule):
+            # Una sola lectura de bit en la tabla de decisión precompilada
+            return (schedule.at(query.ordinal).exempt >> query.letter & 1 == 1 or
+                    not table.is_forbidden(query.ordinal, query.digit, query.minute))
+
+        # Comprobar si la fecha es un día festivo
+        if self.__is_holiday(query, self.online):
+            return True
+
+        return self.__is_allowed_workday(query, schedule.at(query.ordinal))[1]
+
+    # predict sin instrumentar; enable_metrics lo reemplaza por _predict_instrumented
+    _predict_plain = predict
+
+
+    def _predict_instrumented(self):
+        """
+        Igual que predict, pero registra en las métricas activas la etapa que decide el
+        veredicto y la latencia de la consulta de feriados (ver enable_metrics)
+        """
+        metrics = _metrics
+        if metrics is None:
+            return self._predict_plain()
+        query = self._query
+        schedule = _restrictions
+        table = PicoPlaca._decision_table
+        if table is not None and not self.online and table.usable(self.prov, query.ordinal, schedule):
+            verdict = (schedule.at(query.ordinal).exempt >> query.letter & 1 == 1 or
+                       not table.is_forbidden(query.ordinal, query.digit, query.minute))
+            metrics.count('decision_table', verdict)
+            return verdict
+
+        start = _time.perf_counter()
+        if self.online:
+            holiday, cached = online_client().lookup(self.date)
+        else:
+            cached = (self.prov, query.year) in holiday_cache
+            holiday = self.__is_holiday(query, False)
+        metrics.observe_holiday('online' if self.online else 'offline', cached, _time.perf_counter() - start)
+        if holiday:
+            metrics.count('holiday', True)
+            return True
+
+        stage, verdict = self.__is_allowed_workday(query, schedule.at(query.ordinal))
+        metrics.count(stage, verdict)
+        return verdict
+
+
+    async def predict_async(self, resolver=None):
+        """
+        Variante asíncrona de predict: en el modo en línea la consulta de feriados no bloquea
+        el bucle de eventos, las consultas simultáneas de una misma fecha se combinan en una
+        sola solicitud y, si la API no responde a tiempo, se usa el calendario fuera de línea.
+        Con enable_metrics activo registra la etapa que decide el veredicto y la latencia de la
+        consulta de feriados, igual que predict
+
+        Parámetros
+        ----------
+        resolver: AsyncHolidayResolver, opcional
+            resolvedor de feriados a usar (por defecto uno compartido por bucle de eventos)
+        Devoluciones
+        -------
+        Verdadero si el carro con la placa especificada puede estar en el camino
+        en la fecha y hora que se muestra, de lo contrario sera Falso
+        """
+        metrics = _metrics
+        query = self._query
+        schedule = _restrictions
+        start = _time.perf_counter()
+        if self.online:
+            if resolver is None:
+                resolver = async_resolver()
+            holiday, cached = await resolver.lookup(self.date, self.prov)
+        else:
+            cached = metrics is not None and (self.prov, query.year) in holiday_cache
+            holiday = self.__is_holiday(query, False)
+        if metrics is not None:
+            metrics.observe_holiday('online' if self.online else 'offline', cached, _time.perf_counter() - start)
+        if holiday:
+            if metrics is not None:
+                metrics.count('holiday', True)
+            return True
+
+        stage, verdict = self.__is_allowed_workday(query, schedule.at(query.ordinal))
+        if metrics is not None:
+            metrics.count(stage, verdict)
+        return verdict
+
+
+    @classmethod
+    async def predict_many_async(cls, plates, dates, times, online=False, resolver=None, prov='EC-P'):
+        """
+        Comprueba de forma asíncrona y concurrente muchos registros a la vez
+
+        Parámetros
+        ----------
+        plates: secuencia de str
+            placas en formato XX-YYYY o XXX-YYYY
+        dates: secuencia de str
+            fechas en formato ISO 8601 AAAA-MM-DD
+        times: secuencia de str
+            horas en formato HH:MM
+        online: booleano, opcional
+            si online == Verdadero, se utilizará la API de días festivos abstractos
+        resolver: AsyncHolidayResolver, opcional
+            resolvedor de feriados a usar (por defecto uno compartido por bucle de eventos)
+        prov: str, opcional
+            código de provincia según ISO3166-2 (el valor predeterminado es "EC-P")
+        Devoluciones
+        -------
+        Devuelve una lista de booleanos con los veredictos en el mismo orden de la entrada
+        """
+        import asyncio
+        
+        if len(dates) != len(plates) or len(times) != len(plates):
+            raise ValueError('Las placas, fechas y horas deben tener la misma cantidad de registros')
+        queries = [cls(plate, date, time, online, prov) for plate, date, time in zip(plates, dates, times)]
+        return list(await asyncio.gather(*(query.predict_async(resolver) for query in queries)))
+
+
+    def __forbidden_intervals(self, ordinal, schedule):
+        """
+        Calcula los intervalos del día en los que este vehículo no puede circular
+
+        Parámetros
+        ----------
+        ordinal: int
+            fecha como datetime.date.toordinal()
+        schedule: RestrictionSchedule
+            reglas de restricción leídas una vez por quien llama
+        Devoluciones
+        -------
+        Devuelve una lista de tuplas (inicio, fin) en minutos del día, con el fin excluido
+        """
+        query = self._query
+        rules = schedule.at(ordinal)
+        if rules.exempt >> query.letter & 1 or not rules.digits[(ordinal - 1) % 7] >> query.digit & 1:
+            return []
+        if ordinal in holiday_cache.get(self.prov, datetime.date.fromordinal(ordinal).year):
+            return []
+        return [(start, end + 1) for start, end in rules.windows]
+
+
+    @staticmethod
+    def _as_day(value):
+        """Convierte un datetime.date o una cadena AAAA-MM-DD en un ordinal de fecha"""
+        if isinstance(value, datetime.datetime):
+            value = value.date()
+        elif not isinstance(value, datetime.date):
+            value = datetime.date.fromisoformat(value)
+        return value.toordinal()
+
+
+    def next_allowed(self, after=None):
+        """
+        Calcula el siguiente instante, a partir de uno dado (incluido), en que el vehículo
+        puede estar en la carretera, saltando de un intervalo prohibido al siguiente en
+        lugar de probar minuto a minuto. Siempre se usa el calendario fuera de línea.
+
+        Parámetros
+        ----------
+        after: datetime.datetime, opcional
+            instante de partida (por defecto la fecha y hora del objeto); si tiene segundos
+            se parte del minuto siguiente, para no devolver un instante anterior
+        Devoluciones
+        -------
+        Devuelve un datetime.datetime (sin zona horaria, con precisión de minutos)
+        Aumenta
+        ------
+        ValorError
+            Si after no es un datetime.datetime o el vehículo no puede circular en el próximo año
+        """
+        if after is None:
+            ordinal, minute = self._query.ordinal, self._query.minute
+        elif not isinstance(after, datetime.datetime):
+            raise ValueError('El instante de partida debe ser un datetime.datetime')
+        else:
+            ordinal, minute = after.toordinal(), after.hour * 60 + after.minute
+            if after.second or after.microsecond:
+                minute += 1
+        schedule = _restrictions
+        # Un intervalo prohibido sólo puede continuar al día siguiente si termina a medianoche
+        for _ in range(367):
+            for start, end in self.__forbidden_intervals(ordinal, schedule):
+                if start <= minute < end:
+                    minute = end
+            if minute < 24 * 60:
+                return datetime.datetime.fromordinal(ordinal) + datetime.timedelta(minutes=minute)
+            ordinal, minute = ordinal + 1, 0
+        raise ValueError('El vehículo no puede circular en el próximo año')
+
+
+    def circulation_windows(self, start_date, end_date):
+        """
+        Calcula los intervalos en que el vehículo puede y no puede circular entre dos fechas
+        (ambas incluidas), combinando aritméticamente las horas pico, los dígitos restringidos
+        y el calendario de feriados fuera de línea
+
+        Parámetros
+        ----------
+        start_date: datetime.date o str
+            primera fecha (AAAA-MM-DD)
+        end_date: datetime.date o str
+            última fecha (AAAA-MM-DD)
+        Devoluciones
+        -------
+        Devuelve una lista de tuplas (inicio, fin, permitido) con datetime.datetime sin zona
+        horaria, donde el fin está excluido y los intervalos consecutivos cubren todo el rango
+        """
+        first, last = self._as_day(start_date), self._as_day(end_date)
+        if last < first:
+            raise ValueError('La fecha final debe ser mayor o igual a la inicial')
+        minutes_per_day = 24 * 60
+        schedule = _restrictions
+        # Intervalos prohibidos en minutos absolutos, uniendo los que se tocan
+        forbidden = []
+        for ordinal in range(first, last + 1):
+            base = ordinal * minutes_per_day
+            for start, end in self.__forbidden_intervals(ordinal, schedule):
+                if forbidden and forbidden[-1][1] == base + start:
+                    forbidden[-1][1] = base + end
+                else:
+                    forbidden.append([base + start, base + end])
+
+        def to_datetime(absolute):
+            day, minute = divmod(absolute, minutes_per_day)
+            return datetime.datetime.fromordinal(day) + datetime.timedelta(minutes=minute)
+
+        windows = []
+        cursor, stop = first * minutes_per_day, (last + 1) * minutes_per_day
+        for start, end in forbidden:
+            if cursor < start:
+                windows.append((to_datetime(cursor), to_datetime(start), True))
+            windows.append((to_datetime(start), to_datetime(end), False))
+            cursor = end
+        if cursor < stop:
+            windows.append((to_datetime(cursor), to_datetime(stop), True))
+        return windows
+
+
+    def __is_allowed_workday(self, query, rules):
+        """
+        Aplica las reglas de un día que no es feriado: exención por placa, horas pico y dígito restringido
+
+        Parámetros
+        ----------
+        query: PlateQuery
+            consulta ya interpretada
+        rules: RestrictionRules
+            reglas vigentes en la fecha de la consulta, ya compiladas en máscaras de bits
+        Devoluciones
+        -------
+        Devuelve una tupla (etapa, veredicto), donde la etapa que decide es 'exempt', 'time' o
+        'weekday' (ver enable_metrics) y el veredicto es Verdadero si el vehículo puede circular
+        aunque no sea feriado, de lo contrario Falso
+        """
+        # Consultar vehículos excluidos de la restricción según la segunda letra de la placa o si se utilizan sólo dos letras
+        # https://es.wikipedia.org/wiki/Matr%C3%ADculas_automovil%C3%ADsticas_de_Ecuador
+        if rules.exempt >> query.letter & 1:
+            return 'exempt', True
+
+        # Compruebe si el tiempo comprobado no está en las horas pico restringidas
+        if not rules.minutes[query.minute]:
+            return 'time', True
+
+        # Verifique si el último dígito de la placa no está restringido en este día de la semana
+        # (toordinal() == 1 fue lunes)
+        if not rules.digits[(query.ordinal - 1) % 7] >> query.digit & 1:
+            return 'weekday', True
+
+        return 'weekday', False
+
+
+# Ordinal (datetime.date.toordinal) del 1970-01-01, origen de numpy.datetime64
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def _as_codes(values, width):
+    """
+    Convierte una secuencia de cadenas en una matriz de códigos Unicode de ancho fijo
+
+    Parámetros
+    ----------
+    values: secuencia de str o numpy.ndarray
+        cadenas a convertir
+    width: int
+        número máximo de caracteres permitido
+    Devoluciones
+    -------
+    Devuelve una tupla (codes, lengths) donde codes es una matriz uint32 de forma (n, width)
+    con los códigos de cada carácter (0 como relleno) y lengths la longitud de cada cadena,
+    o None si alguna cadena supera el ancho permitido
+    """
+    import numpy as np
+    
+    arr = np.asarray(values)
+    if arr.dtype.kind != 'U':
+        arr = arr.astype(str)
+    arr = arr.reshape(-1)
+    lengths = np.char.str_len(arr)
+    if arr.size and lengths.max() > width:
+        return None
+    codes = np.ascontiguousarray(arr.astype('U%d' % width)).view(np.uint32).reshape(-1, width)
+    return codes, lengths
+
+
+def _first_invalid(valid):
+    """Devuelve la posición del primer registro no válido de una máscara booleana"""
+    import numpy as np
+    
+    return int(np.argmin(valid))
+
+
+class FleetIndex:
+    """
+    Índice compacto de una flota de vehículos para planificar su disponibilidad.
+    Cada placa se codifica como un entero de 32 bits (tres letras de 5 bits y el número
+    de 14 bits; las placas de dos letras usan 31 en la tercera letra) guardado en un
+    array('I'), agrupado por clase de placa (segunda letra, o SHORT_PLATE) y último dígito,
+    que es todo lo que usan las reglas de restricción; así cada vehículo ocupa 4 bytes y las
+    consultas operan por grupo y no por vehículo.
+    ...
+    Metodos
+    -------
+    encode(plate):
+        Codifica una placa como entero
+    decode(code):
+        Devuelve la placa de un entero codificado
+    add(self, plate):
+        Agrega un vehículo al índice
+    extend(self, plates):
+        Agrega varios vehículos al índice
+    codes(self):
+        Devuelve todos los vehículos codificados en el orden de las columnas de availability_matrix
+    available(self, date, time):
+        Devuelve los vehículos que pueden circular en una fecha y hora
+    availability_matrix(self, start_date, days):
+        Devuelve la matriz {día x vehículo} de disponibilidad en horas pico
+    """
+    _plate_re = re.compile('^[A-Z]{2,3}-[0-9]{4}$')
+
+    def __init__(self, plates=(), prov='EC-P'):
+        """
+        Se construye todos los atributos necesarios para el objeto FleetIndex.
+
+        Parámetros
+        ----------
+        plates: iterable de str, opcional
+            placas iniciales de la flota
+        prov: str, opcional
+            código de provincia según ISO3166-2 cuyo calendario de feriados se usa
+        """
+        self.prov = prov
+        # Un grupo por clase de placa y último dígito, en la posición clase * 10 + dígito
+        self._groups = [array('I') for _ in range((SHORT_PLATE + 1) * 10)]
+        self.extend(plates)
+
+
+    def __len__(self):
+        return sum(len(group) for group in self._groups)
+
+
+    @staticmethod
+    def encode(plate):
+        """
+        Codifica una placa XX-YYYY o XXX-YYYY como un entero de 29 bits
+
+        Parámetros
+        ----------
+        plate: str
+            placa del vehículo
+        Devoluciones
+        -------
+        Devuelve el entero codificado
+        Aumenta
+        ------
+        ValorError
+            Si la placa no tiene el formato XX-YYYY o XXX-YYYY
+        """
+        if not isinstance(plate, str) or not FleetIndex._plate_re.match(plate):
+            raise ValueError(
+                'La placa debe tener el siguiente formato: XX-YYYY o XXX-YYYY, donde X es una letra mayúscula e Y es un dígito')
+        letters, number = plate.split('-')
+        third = ord(letters[2]) - 65 if len(letters) == 3 else 31
+        return (ord(letters[0]) - 65) << 24 | (ord(letters[1]) - 65) << 19 | third << 14 | int(number)
+
+
+    @staticmethod
+    def decode(code):
+        """
+        Devuelve la placa XX-YYYY o XXX-YYYY de un entero codificado con encode
+        """
+        third = code >> 14 & 31
+        letters = chr((code >> 24 & 31) + 65) + chr((code >> 19 & 31) + 65)
+        if third != 31:
+            letters += chr(third + 65)
+        return '{}-{:04d}'.format(letters, code & 0x3FFF)
+
+
+    def add(self, plate):
+        """
+        Agrega un vehículo al índice
+
+        Parámetros
+        ----------
+        plate: str
+            placa en formato XX-YYYY o XXX-YYYY
+        """
+        code = self.encode(plate)
+        self._groups[PicoPlaca._plate_letter(plate) * 10 + ord(plate[-1]) - 48].append(code)
+
+
+    def extend(self, plates):
+        """Agrega varios vehículos al índice"""
+        for plate in plates:
+            self.add(plate)
+
+
+    def codes(self):
+        """
+        Devuelve un array('I') con todos los vehículos codificados, agrupados por clase de placa
+        y último dígito; es el orden de las columnas de availability_matrix
+        """
+        result = array('I')
+        for group in self._groups:
+            result.extend(group)
+        return result
+
+
+    def available(self, date, time):
+        """
+        Devuelve los vehículos que pueden estar en la carretera en una fecha y hora,
+        uniendo los grupos exentos o de dígitos no restringidos
+
+        Parámetros
+        ----------
+        date: datetime.date o str
+            fecha (AAAA-MM-DD)
+        time: datetime.time o str
+            hora (HH:MM)
+        Devoluciones
+        -------
+        Devuelve un array('I') con los vehículos codificados (ver decode)
+        """
+        if not isinstance(time, datetime.time):
+            time = datetime.time.fromisoformat(time)
+        ordinal = PicoPlaca._as_day(date)
+        schedule = _restrictions
+        restricted = PicoPlaca._restricted_digits(ordinal, time.hour * 60 + time.minute, self.prov, schedule)
+        exempt = schedule.at(ordinal).exempt
+        result = array('I')
+        for group, codes in enumerate(self._groups):
+            letter, digit = divmod(group, 10)
+            if digit not in restricted or exempt >> letter & 1:
+                result.extend(codes)
+        return result
+
+
+    def availability_matrix(self, start_date, days):
+        """
+        Calcula qué vehículos pueden circular en horas restringidas en cada uno de los próximos días
+
+        Parámetros
+        ----------
+        start_date: datetime.date o str
+            primer día (AAAA-MM-DD)
+        days: int
+            número de días
+        Devoluciones
+        -------
+        Devuelve una tupla (dates, matrix) donde dates es la lista de datetime.date y matrix
+        un numpy.ndarray booleano de forma (days, len(self)) con las columnas en el orden de codes()
+        """
+        import numpy as np
+        
+        first = PicoPlaca._as_day(start_date)
+        schedule = _restrictions
+        exempt_tables = schedule.arrays()[2]
+        rules = schedule.index(np.arange(first, first + days))
+        # {día x clase de placa x dígito}: exenta o dígito no restringido
+        group_allowed = np.ones((days, SHORT_PLATE + 1, 10), dtype=bool)
+        for i in range(days):
+            group_allowed[i, :, list(PicoPlaca._restricted_digits(first + i, prov=self.prov, schedule=schedule))] = False
+        group_allowed |= exempt_tables[rules][:, :, None]
+        group_allowed = group_allowed.reshape(days, -1)
+        column_groups = np.repeat(np.arange(len(self._groups)), [len(group) for group in self._groups])
+        dates = [datetime.date.fromordinal(first + i) for i in range(days)]
+        return dates, group_allowed[:, column_groups]
+
+
+class DecisionTable:
+    """
+    Tabla de decisión precompilada de Pico y Placa guardada como un arreglo de bits en un
+    archivo que se carga con mmap sin ningún análisis. Hay un bit por cada combinación
+    (día, último dígito, minuto del día) dentro del rango de años compilado, que vale 1
+    cuando un vehículo no exento con ese último dígito no puede circular; los feriados,
+    fines de semana y minutos fuera de las horas pico quedan en 0. Varias instancias o
+    procesos que cargan el mismo archivo comparten las mismas páginas de memoria.
+
+    Formato del archivo: cabecera de 28 bytes (firma b'PYPT', versión, reservado, código
+    de provincia de 8 bytes, ordinal del primer día, número de días, huella de las reglas de
+    restricción; little-endian) seguida de los bits, con el índice
+    ((día - primer día) * 10 + dígito) * 1440 + minuto. Las exenciones por placa no se
+    compilan: se leen de las reglas vigentes, cuya huella debe coincidir con la de la tabla.
+    ...
+    Atributos
+    ----------
+    first_ordinal: int
+        ordinal (datetime.date.toordinal) del primer día de la tabla
+    n_days: int
+        número de días de la tabla
+    prov: str
+        código de provincia según ISO3166-2 del calendario compilado
+    fingerprint: int
+        huella (RestrictionSchedule.fingerprint) de las reglas compiladas
+    Metodos
+    -------
+    compile(path, first_year, last_year, prov='EC-P'):
+        Compila la tabla de un rango de años y la guarda en un archivo
+    load(path):
+        Carga con mmap una tabla compilada
+    usable(self, prov, ordinal):
+        Devuelve True si la tabla sirve para una provincia y día con las reglas vigentes
+    is_forbidden(self, ordinal, digit, minute):
+        Lee el bit correspondiente de la tabla
+    predict(self, plate, date, time):
+        Devuelve True si el vehículo puede estar en la carretera
+    close(self):
+        Libera el mapeo de memoria
+    """
+    MAGIC = b'PYPT'
+    VERSION = 3
+    _header = struct.Struct('<4sHH8siII')
+    _minutes = 24 * 60
+
+    def __init__(self, buffer, first_ordinal, n_days, prov='EC-P', file=None, fingerprint=None):
+        """
+        Se construye todos los atributos necesarios para el objeto DecisionTable; normalmente
+        se usa DecisionTable.load en lugar de llamarlo directamente.
+        """
+        self._buf = buffer
+        self._file = file
+        self.first_ordinal = first_ordinal
+        self.n_days = n_days
+        self.prov = prov
+        self.fingerprint = fingerprint
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    @classmethod
+    def compile(cls, path, first_year, last_year, prov='EC-P'):
+        """
+        Compila las restricciones por dígito y las horas restringidas de las reglas vigentes
+        y los calendarios de HolidayEcuador de un rango de años en una tabla de bits y la
+        guarda en un archivo
+
+        Parámetros
+        ----------
+        path: str
+            archivo de destino
+        first_year: int
+            primer año de la tabla
+        last_year: int
+            último año de la tabla (incluido)
+        prov: str, opcional
+            código de provincia según ISO3166-2 (el valor predeterminado es "EC-P")
+        """
+        import numpy as np
+        
+        if last_year < first_year:
+            raise ValueError('El último año debe ser mayor o igual al primero')
+        first_ordinal = datetime.date(first_year, 1, 1).toordinal()
+        n_days = datetime.date(last_year, 12, 31).toordinal() - first_ordinal + 1
+        schedule = _restrictions
+        minute_masks, digit_tables, _ = schedule.arrays()
+        with open(path, 'wb') as f:
+            f.write(cls._header.pack(cls.MAGIC, cls.VERSION, 0, prov.encode('ascii'), first_ordinal, n_days,
+                                     schedule.fingerprint))
+            # Un año por vez para acotar la memoria; 1440 * 10 bits por día es múltiplo de 8
+            for year in range(first_year, last_year + 1):
+                start = datetime.date(year, 1, 1).toordinal()
+                ordinals = np.arange(start, datetime.date(year, 12, 31).toordinal() + 1)
+                rules = schedule.index(ordinals)
+                # toordinal() == 1 es lunes, weekday 0
+                restricted = digit_tables[rules, (ordinals - 1) % 7]
+                restricted[np.isin(ordinals, list(holiday_cache.get(prov, year)))] = False
+                bits = restricted[:, :, None] & minute_masks[rules][:, None, :]
+                f.write(np.packbits(bits, axis=None, bitorder='little').tobytes())
+
+
+    @classmethod
+    def load(cls, path):
+        """
+        Carga con mmap una tabla compilada, sin leer ni analizar su contenido
+
+        Parámetros
+        ----------
+        path: str
+            archivo generado por DecisionTable.compile
+        Devoluciones
+        -------
+        Devuelve un objeto DecisionTable
+        Aumenta
+        ------
+        ValorError
+            Si el archivo no es una tabla de decisión válida
+        """
+        f = open(path, 'rb')
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            f.close()
+            raise ValueError('El archivo {} no es una tabla de decisión válida'.format(path)) from None
+        if len(buf) < cls._header.size:
+            buf.close()
+            f.close()
+            raise ValueError('El archivo {} no es una tabla de decisión válida'.format(path))
+        magic, version, _, prov, first_ordinal, n_days, fingerprint = cls._header.unpack_from(buf)
+        if (magic != cls.MAGIC or version != cls.VERSION or
+                len(buf) != cls._header.size + n_days * 10 * cls._minutes // 8):
+            buf.close()
+            f.close()
+            raise ValueError('El archivo {} no es una tabla de decisión válida'.format(path))
+        return cls(buf, first_ordinal, n_days, prov.rstrip(b'\0').decode('ascii'), f, fingerprint)
+
+
+    def covers(self, ordinal):
+        """Devuelve True si el día (ordinal) está dentro del rango de la tabla"""
+        return 0 <= ordinal - self.first_ordinal < self.n_days
+
+
+    def usable(self, prov, ordinal, schedule=None):
+        """
+        Devuelve True si la tabla corresponde a la provincia, cubre el día (ordinal) y se
+        compiló con las reglas de restricción schedule (por defecto las vigentes)
+        """
+        if schedule is None:
+            schedule = _restrictions
+        return (self.prov == prov and 0 <= ordinal - self.first_ordinal < self.n_days and
+                self.fingerprint == schedule.fingerprint)
+
+
+    def is_forbidden(self, ordinal, digit, minute):
+        """
+        Lee el bit de la tabla para un vehículo no exento
+
+        Parámetros
+        ----------
+        ordinal: int
+            día como datetime.date.toordinal()
+        digit: int
+            último dígito de la placa
+        minute: int
+            minuto del día (0 a 1439)
+        Devoluciones
+        -------
+        Devuelve True si el vehículo no puede circular, de lo contrario False
+        Aumenta
+        ------
+        ValorError
+            Si el día está fuera del rango de la tabla
+        """
+        day = ordinal - self.first_ordinal
+        if not 0 <= day < self.n_days:
+            raise ValueError('La fecha está fuera del rango de la tabla de decisión')
+        i = (day * 10 + digit) * self._minutes + minute
+        return (self._buf[self._header.size + (i >> 3)] >> (i & 7)) & 1 == 1
+
+
+    def predict(self, plate, date, time):
+        """
+        Comprueba si el vehículo puede estar en la carretera leyendo un único bit de la tabla
+
+        Parámetros
+        ----------
+        plate: str
+            placa en formato XX-YYYY o XXX-YYYY (ya validada)
+        date: str
+            fecha en formato ISO 8601 AAAA-MM-DD
+        time: str
+            hora en formato HH:MM
+        Devoluciones
+        -------
+        Verdadero si el carro con la placa especificada puede estar en el camino
+        en la fecha y hora que se muestra, de lo contrario sera Falso
+        Aumenta
+        ------
+        ValorError
+            Si la tabla se compiló con otras reglas de restricción o la fecha está fuera de su rango
+        """
+        schedule = _restrictions
+        if self.fingerprint != schedule.fingerprint:
+            raise ValueError('La tabla de decisión se compiló con otras reglas de restricción')
+        ordinal = datetime.date.fromisoformat(date).toordinal()
+        if schedule.at(ordinal).exempt >> PicoPlaca._plate_letter(plate) & 1:
+            return True
+        minute = int(time[:2]) * 60 + int(time[3:5])
+        return not self.is_forbidden(ordinal, int(plate[-1]), minute)
+
+
+    def close(self):
+        """Libera el mapeo de memoria y cierra el archivo"""
+        self._buf.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def _init_batch_worker(calendars, schedule=None):
+    """
+    Inicializa un proceso trabajador de PicoPlaca.predict_parallel con los calendarios
+    de feriados y las reglas de restricción del proceso principal
+
+    Parámetros
+    ----------
+    calendars: dict
+        diccionario {(provincia, año): ordinales festivos}
+    schedule: RestrictionSchedule, opcional
+        reglas vigentes en el proceso principal
+    """
+    for (prov, year), calendar in calendars.items():
+        holiday_cache.put(prov, year, calendar)
+    if schedule is not None:
+        load_restrictions(schedule)
+
+
+def _predict_chunk(chunk):
+    """
+    Evalúa un bloque (posición del primer registro, placas, fechas, horas, provincia) dentro
+    de un proceso trabajador; los errores indican la posición del registro en el lote completo
+    """
+    offset, plates, dates, times, prov = chunk
+    try:
+        return PicoPlaca.predict_many(plates, dates, times, prov)
+    except ValueError as e:
+        raise ValueError(re.sub(r'\(registro (\d+)\)$',
+                                lambda match: '(registro {})'.format(int(match.group(1)) + offset),
+                                str(e))) from None
+
+
+def read_records(stream, fmt='csv'):
+    """
+    Lee registros de placa, fecha y hora de un flujo de texto, uno por línea, sin cargar
+    el archivo completo en memoria
+
+    Parámetros
+    ----------
+    stream: objeto tipo archivo de texto
+        flujo de entrada, por ejemplo un archivo abierto o sys.stdin
+    fmt: str, opcional
+        'csv' (columnas placa, fecha, hora; la cabecera es opcional) o 'jsonl'
+        (un objeto {"plate": ..., "date": ..., "time": ...} por línea); el valor predeterminado es 'csv'
+    Devoluciones
+    -------
+    Genera tuplas (línea, registro) donde registro es un diccionario con las claves
+    plate, date y time, o un ValueError si la línea no se pudo interpretar
+    """
+    if fmt == 'jsonl':
+        for line, text in enumerate(stream, 1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+                if not isinstance(row, dict):
+                    raise ValueError
+            except ValueError:
+                yield line, ValueError('La línea no es un objeto JSON válido')
+                continue
+            yield line, {key: str(row.get(key, '')) for key in ('plate', 'date', 'time')}
+    elif fmt == 'csv':
+        for line, row in enumerate(csv.reader(stream), 1):
+            if not row:
+                continue
+            if line == 1 and row[0].strip().lower() in ('plate', 'placa'):
+                continue
+            if len(row) != 3:
+                yield line, ValueError('Se esperaban 3 columnas (placa, fecha, hora) y se encontraron {}'.format(len(row)))
+                continue
+            yield line, dict(zip(('plate', 'date', 'time'), (value.strip() for value in row)))
+    else:
+        raise ValueError('Formato de lote desconocido: {}'.format(fmt))
+
+
+def predict_records(records, online=False):
+    """
+    Evalúa de forma perezosa los registros producidos por read_records
+
+    Parámetros
+    ----------
+    records: iterable
+        tuplas (línea, registro) como las que genera read_records
+    online: booleano, opcional
+        si online == Verdadero, se utilizará la API de días festivos abstractos
+    Devoluciones
+    -------
+    Genera tuplas (línea, registro, veredicto, error); veredicto es None cuando el registro
+    no es válido y error contiene el ValueError correspondiente
+    """
+    for line, row in records:
+        if isinstance(row, ValueError):
+            yield line, None, None, row
+            continue
+        try:
+            verdict = PicoPlaca(row['plate'], row['date'], row['time'], online).predict()
+        except ValueError as e:
+            yield line, row, None, e
+            continue
+        yield line, row, verdict, None
+
+
+def run_batch(stream, out, err, fmt='csv', online=False):
+    """
+    Procesa un lote de registros escribiendo cada veredicto en cuanto se calcula; los
+    registros con errores se informan por un canal aparte en lugar de abortar el lote
+
+    Parámetros
+    ----------
+    stream: objeto tipo archivo de texto
+        flujo de entrada con los registros
+    out: objeto tipo archivo de texto
+        flujo donde se escriben los veredictos, en el mismo formato que la entrada
+    err: objeto tipo archivo de texto
+        flujo donde se informan los registros mal formados
+    fmt: str, opcional
+        'csv' o 'jsonl' (el valor predeterminado es 'csv')
+    online: booleano, opcional
+        si online == Verdadero, se utilizará la API de días festivos abstractos
+    Devoluciones
+    -------
+    Devuelve la cantidad de registros mal formados
+    """
+    writer = csv.writer(out, lineterminator='\n') if fmt == 'csv' else None
+    if writer is not None:
+        writer.writerow(('plate', 'date', 'time', 'allowed'))
+    errors = 0
+    for line, row, verdict, error in predict_records(read_records(stream, fmt), online):
+        if error is not None:
+            errors += 1
+            err.write('línea {}: {}\n'.format(line, error))
+        elif writer is not None:
+            writer.writerow((row['plate'], row['date'], row['time'], verdict))
+        else:
+            out.write(json.dumps(dict(row, allowed=verdict)) + '\n')
+    return errors
+
+
+# Infracción detectada por ViolationDetector: placa, marca de tiempo Unix (segundos) y cámara
+Violation = namedtuple('Violation', 'plate epoch camera')
+
+
+class ViolationDetector:
+    """
+    Etapa de un flujo de eventos de cámaras ANPR (placa, marca de tiempo Unix, cámara) que
+    emite sólo las infracciones de Pico y Placa. Los eventos llegan desordenados y con
+    lecturas repetidas: se reordenan en un montículo dentro de una ventana acotada y se
+    procesan en orden cuando la marca de agua (la mayor marca de tiempo vista menos la
+    ventana) los supera; una placa ya reportada no se vuelve a reportar dentro del intervalo
+    de supresión. Cada evento se evalúa con aritmética entera sobre la marca de tiempo, sin
+    construir cadenas ni objetos PicoPlaca, con las mismas reglas que predict y el
+    calendario de feriados fuera de línea. La memoria está acotada por max_pending y
+    max_plates.
+    ...
+    Atributos
+    ----------
+    window: float
+        segundos de tolerancia al desorden; los eventos más antiguos que la marca de agua se descartan
+    dedup: float
+        segundos durante los que no se vuelve a reportar una placa ya reportada
+    prov: str
+        código de provincia según ISO3166-2 del calendario de feriados
+    max_pending: int
+        eventos como máximo esperando en la ventana; al superarlo se procesa el más antiguo
+    max_plates: int
+        placas reportadas recordadas como máximo para la supresión de repetidos
+    Metodos
+    -------
+    push(self, plate, epoch, camera):
+        Agrega un evento y devuelve las infracciones que quedan listas
+    flush(self):
+        Procesa todos los eventos pendientes y devuelve sus infracciones
+    run(self, events):
+        Genera las infracciones de un iterable de eventos, vaciando la ventana al terminar
+    stats(self):
+        Devuelve los contadores de eventos
+    """
+    __plate_re = re.compile('^[A-Z]{2,3}-[0-9]{4}$')
+    # Segundos que se restan a una marca de tiempo Unix para obtener la hora de Quito (UTC-5)
+    __utc_offset = 5 * 3600
+
+    def __init__(self, window=60.0, dedup=300.0, prov='EC-P', max_pending=100000, max_plates=100000):
+        """
+        Se construye todos los atributos necesarios para el objeto ViolationDetector.
+        """
+        if window < 0 or dedup < 0 or max_pending < 1 or max_plates < 1:
+            raise ValueError('La ventana, el intervalo y los límites del detector deben ser positivos')
+        if prov not in PROVINCES:
+            raise ValueError('Provincia desconocida: {}'.format(prov))
+        self.window = window
+        self.dedup = dedup
+        self.prov = prov
+        self.max_pending = max_pending
+        self.max_plates = max_plates
+        # Montículo de (epoch, secuencia, placa, cámara); la secuencia desempata sin comparar placas
+        self._heap = []
+        self._seq = 0
+        self._max_epoch = None
+        self._watermark = None
+        # Última infracción reportada por placa, en orden de marca de tiempo
+        self._reported = OrderedDict()
+        # Día en curso: (ordinal, esquema de reglas, reglas, máscara de dígitos restringidos)
+        self._day = (None, None, None, 0)
+        self._counts = {'events': 0, 'late': 0, 'invalid': 0, 'duplicates': 0, 'violations': 0}
+
+
+    def push(self, plate, epoch, camera=None):
+        """
+        Agrega un evento a la ventana de reordenamiento
+
+        Parámetros
+        ----------
+        plate: str
+            placa leída, en formato XX-YYYY o XXX-YYYY
+        epoch: int o float
+            marca de tiempo Unix (segundos) de la lectura
+        camera: opcional
+            identificador de la cámara, que se copia en la infracción
+        Devoluciones
+        -------
+        Devuelve una lista de Violation, en orden de marca de tiempo, con las infracciones de
+        los eventos que la marca de agua dejó listos (normalmente vacía)
+        """
+        self._counts['events'] += 1
+        if self._watermark is not None and epoch < self._watermark:
+            self._counts['late'] += 1
+            return []
+        heapq.heappush(self._heap, (epoch, self._seq, plate, camera))
+        self._seq += 1
+        if self._max_epoch is None or epoch > self._max_epoch:
+            self._max_epoch = epoch
+        watermark = self._max_epoch - self.window
+        violations = []
+        heap = self._heap
+        while heap and (heap[0][0] <= watermark or len(heap) > self.max_pending):
+            event = heapq.heappop(heap)
+            # Tras forzar un evento por el límite de memoria, la marca de agua avanza hasta él
+            watermark = max(watermark, event[0])
+            self.__process(event, violations)
+        if self._watermark is None or watermark > self._watermark:
+            self._watermark = watermark
+        return violations
+
+
+    def flush(self):
+        """
+        Procesa todos los eventos que esperan en la ventana, por ejemplo al final de un archivo
+
+        Devoluciones
+        -------
+        Devuelve una lista de Violation en orden de marca de tiempo
+        """
+        violations = []
+        while self._heap:
+            event = heapq.heappop(self._heap)
+            self._watermark = event[0]
+            self.__process(event, violations)
+        return violations
+
+
+    def run(self, events):
+        """
+        Evalúa de forma perezosa un iterable de eventos (placa, epoch, cámara)
+
+        Parámetros
+        ----------
+        events: iterable de tuplas
+            eventos (placa, marca de tiempo Unix, cámara), posiblemente desordenados
+        Devoluciones
+        -------
+        Genera las Violation en orden de marca de tiempo; al agotarse el iterable se vacía la ventana
+        """
+        push = self.push
+        for plate, epoch, camera in events:
+            violations = push(plate, epoch, camera)
+            if violations:
+                yield from violations
+        yield from self.flush()
+
+
+    def stats(self):
+        """
+        Devuelve un diccionario con los eventos recibidos, descartados por llegar tarde,
+        con placa no válida, repetidos suprimidos, infracciones emitidas y pendientes en la ventana
+        """
+        return dict(self._counts, pending=len(self._heap), plates=len(self._reported))
+
+
+    def __process(self, event, violations):
+        """Evalúa un evento ya ordenado y agrega su infracción a violations si corresponde"""
+        epoch, _, plate, camera = event
+        if not isinstance(plate, str) or not self.__plate_re.match(plate):
+            self._counts['invalid'] += 1
+            return
+        # Día y minuto en la hora de Quito, sin pasar por datetime
+        days, seconds = divmod(int(epoch) - self.__utc_offset, 86400)
+        ordinal = days + _EPOCH_ORDINAL
+        day_ordinal, schedule, rules, digits = self._day
+        if ordinal != day_ordinal or schedule is not _restrictions:
+            # Una vez por día (o por recarga de reglas): reglas vigentes y dígitos restringidos,
+            # ninguno si es feriado
+            schedule = _restrictions
+            rules = schedule.at(ordinal)
+            digits = rules.digits[(ordinal - 1) % 7]
+            if ordinal in holiday_cache.get(self.prov, datetime.date.fromordinal(ordinal).year):
+                digits = 0
+            self._day = (ordinal, schedule, rules, digits)
+        if not digits >> (ord(plate[-1]) - 48) & 1 or not rules.minutes[seconds // 60]:
+            return
+        if rules.exempt >> (SHORT_PLATE if plate[2] == '-' else ord(plate[1]) - 65) & 1:
+            return
+
+        # Supresión de lecturas repetidas de una placa ya reportada
+        reported = self._reported
+        while reported and (len(reported) >= self.max_plates or
+                            next(iter(reported.values())) < epoch - self.dedup):
+            reported.popitem(last=False)
+        last = reported.get(plate)
+        if last is not None and epoch - last <= self.dedup:
+            self._counts['duplicates'] += 1
+            return
+        reported[plate] = epoch
+        reported.move_to_end(plate)
+        self._counts['violations'] += 1
+        violations.append(Violation(plate, epoch, camera))
+
+
+def _as_epoch(value):
+    """Convierte una marca de tiempo Unix (número o cadena) en int, o en float si tiene decimales"""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError('Marca de tiempo no válida: {!r}'.format(value))
+    if isinstance(value, str):
+        try:
+            value = int(value)
+        except ValueError:
+            value = float(value)
+    # También descarta NaN, infinitos y fechas fuera del rango de datetime.date
+    if not 0 <= value < 253402300800:
+        raise ValueError('Marca de tiempo no válida: {!r}'.format(value))
+    return value
+
+
+def read_events(stream, fmt='csv'):
+    """
+    Lee eventos de cámaras (placa, marca de tiempo Unix, cámara) de un flujo de texto, uno
+    por línea, sin cargar el flujo completo en memoria; las líneas mal formadas se omiten
+
+    Parámetros
+    ----------
+    stream: objeto tipo archivo de texto
+        flujo de entrada, por ejemplo un archivo abierto o sys.stdin
+    fmt: str, opcional
+        'csv' (columnas placa, epoch, cámara; la cabecera es opcional) o 'jsonl'
+        (un objeto {"plate": ..., "epoch": ..., "camera": ...} por línea); el valor predeterminado es 'csv'
+    Devoluciones
+    -------
+    Genera tuplas (placa, epoch, cámara)
+    """
+    if fmt == 'jsonl':
+        for text in stream:
+            try:
+                row = json.loads(text)
+                yield row['plate'], _as_epoch(row['epoch']), row.get('camera')
+            except (ValueError, TypeError, KeyError, AttributeError):
+                continue
+    elif fmt == 'csv':
+        for row in csv.reader(stream):
+            if len(row) != 3:
+                continue
+            try:
+                yield row[0].strip(), _as_epoch(row[1].strip()), row[2].strip()
+            except ValueError:
+                continue
+    else:
+        raise ValueError('Formato de eventos desconocido: {}'.format(fmt))
+
+
+def run_events(stream, out, fmt='csv', window=60.0, dedup=300.0):
+    """
+    Procesa un flujo de eventos de cámaras escribiendo cada infracción en cuanto la marca de
+    agua la deja lista, de modo que sirve para flujos sin fin (por ejemplo sys.stdin)
+
+    Parámetros
+    ----------
+    stream: objeto tipo archivo de texto
+        flujo de entrada con los eventos (ver read_events)
+    out: objeto tipo archivo de texto
+        flujo donde se escriben las infracciones, en el mismo formato que la entrada
+    fmt: str, opcional
+        'csv' o 'jsonl' (el valor predeterminado es 'csv')
+    window: float, opcional
+        segundos de tolerancia al desorden (ver ViolationDetector)
+    dedup: float, opcional
+        segundos de supresión de lecturas repetidas (ver ViolationDetector)
+    Devoluciones
+    -------
+    Devuelve el diccionario de contadores de ViolationDetector.stats
+    """
+    detector = ViolationDetector(window, dedup)
+    writer = csv.writer(out, lineterminator='\n') if fmt == 'csv' else None
+    if writer is not None:
+        writer.writerow(Violation._fields)
+    for violation in detector.run(read_events(stream, fmt)):
+        if writer is not None:
+            writer.writerow(violation)
+        else:
+            out.write(json.dumps(violation._asdict()) + '\n')
+    return detector.stats()
+
+
+class PredictionServer:
+    """
+    Servicio HTTP/1.1 de larga duración basado en asyncio que mantiene los calendarios de
+    feriados en memoria y atiende predicciones con conexiones persistentes (keep-alive).
+    Rutas:
+        GET  /predict?plate=PBX-1234&date=2021-04-05&time=08:00[&prov=EC-P][&online=1]
+        POST /predict/batch con el cuerpo JSON {"plates": [...], "dates": [...], "times": [...], "prov": "EC-P"}
+        GET  /health
+        GET  /metrics (formato de texto de Prometheus, sólo con enable_metrics activo)
+    Las respuestas son JSON salvo /metrics; los registros no válidos devuelven 400 con {"error": mensaje}.
+    Los lotes se evalúan en un hilo aparte y admiten hasta max_batch registros (413 si son más),
+    para que un lote grande no demore las demás conexiones.
+    ...
+    Atributos
+    ----------
+    host: str
+        dirección donde escucha el servicio
+    port: int
+        puerto donde escucha el servicio (0 elige uno libre)
+    provinces: lista de str
+        provincias cuyos calendarios se precargan
+    Metodos
+    -------
+    start(self):
+        Corrutina que precarga los calendarios y empieza a escuchar
+    serve_forever(self):
+        Corrutina que atiende solicitudes hasta que se cancele
+    close(self):
+        Corrutina que detiene el servicio
+    """
+    _reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                413: 'Payload Too Large'}
+    max_body = 8 * 1024 * 1024
+    max_batch = 100000
+
+    def __init__(self, host='127.0.0.1', port=8080, provinces=('EC-P',)):
+        """
+        Se construye todos los atributos necesarios para el objeto PredictionServer.
+        """
+        self.host = host
+        self.port = port
+        self.provinces = list(provinces)
+        self._server = None
+
+
+    async def start(self):
+        """Precarga los calendarios del año anterior, el actual y el siguiente y empieza a escuchar"""
+        import asyncio
+        
+        year = datetime.date.today().year
+        for prov in self.provinces:
+            holiday_cache.warm_up(range(year - 1, year + 2), prov=prov)
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+
+    async def serve_forever(self):
+        """Atiende solicitudes hasta que se cancele"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+
+    async def close(self):
+        """Detiene el servicio"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+    async def _handle(self, reader, writer):
+        """Atiende las solicitudes de una conexión mientras el cliente la mantenga abierta"""
+        import asyncio
+
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ')
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'Solicitud mal formada'}, False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = (headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1')
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'Content-Length no válido'}, False)
+                    break
+                if length > self.max_body:
+                    await self._respond(writer, 413, {'error': 'Cuerpo demasiado grande'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                status, payload = await self._route(method, target, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+    async def _route(self, method, target, body):
+        """Devuelve el código de estado y el contenido JSON de una solicitud"""
+        import asyncio
+        import urllib.parse
+        
+        url = urllib.parse.urlsplit(target)
+        try:
+            if url.path == '/predict':
+                if method != 'GET':
+                    return 405, {'error': 'Use GET'}
+                query = dict(urllib.parse.parse_qsl(url.query))
+                pyp = PicoPlaca(query.get('plate', ''), query.get('date', ''), query.get('time', ''),
+                                query.get('online') in ('1', 'true'), query.get('prov', 'EC-P'))
+                allowed = await pyp.predict_async() if pyp.online else pyp.predict()
+                return 200, {'plate': pyp.plate, 'date': pyp.date, 'time': pyp.time, 'allowed': allowed}
+            if url.path == '/predict/batch':
+                if method != 'POST':
+                    return 405, {'error': 'Use POST'}
+                # Un lote grande no debe detener el bucle de eventos que atiende las demás conexiones
+                return await asyncio.get_running_loop().run_in_executor(None, self._predict_batch, body)
+            if url.path == '/health':
+                return 200, {'status': 'ok', 'rules': '{:08x}'.format(_restrictions.fingerprint)}
+            if url.path == '/metrics' and _metrics is not None:
+                return 200, _metrics.to_prometheus()
+            return 404, {'error': 'Ruta desconocida: {}'.format(url.path)}
+        except ValueError as e:
+            return 400, {'error': str(e)}
+
+
+    def _predict_batch(self, body):
+        """
+        Interpreta y evalúa el cuerpo de POST /predict/batch; se ejecuta fuera del bucle de eventos
+
+        Devoluciones
+        -------
+        Devuelve el código de estado y el contenido JSON de la respuesta
+        Aumenta
+        ------
+        ValorError
+            Si algún registro no es válido
+        """
+        try:
+            request = json.loads(body)
+            plates, dates, times = request['plates'], request['dates'], request['times']
+        except (ValueError, KeyError, TypeError):
+            return 400, {'error': 'Se esperaba un objeto JSON con plates, dates y times'}
+        if not all(isinstance(values, list) for values in (plates, dates, times)):
+            return 400, {'error': 'plates, dates y times deben ser listas'}
+        if max(len(plates), len(dates), len(times)) > self.max_batch:
+            return 413, {'error': 'El lote supera los {} registros'.format(self.max_batch)}
+        prov = request.get('prov', 'EC-P')
+        if not isinstance(prov, str) or prov not in PROVINCES:
+            return 400, {'error': 'Provincia desconocida: {}'.format(prov)}
+        return 200, {'allowed': PicoPlaca.predict_many(plates, dates, times, prov).tolist()}
+
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        """Escribe una respuesta JSON, o de texto si el contenido es una cadena"""
+        if isinstance(payload, str):
+            data, content_type = payload.encode('utf-8'), 'text/plain; version=0.0.4'
+        else:
+            data, content_type = json.dumps(payload).encode('utf-8'), 'application/json'
+        writer.write('HTTP/1.1 {} {}\r\nContent-Type: {}\r\nContent-Length: {}\r\n'
+                     'Connection: {}\r\n\r\n'.format(status, self._reasons[status], content_type, len(data),
+                                                     'keep-alive' if keep_alive else 'close').encode('latin-1') + data)
+        await writer.drain()
+
+
+async def run_load(host, port, duration=10.0, concurrency=16, target='/predict?plate=PBX-1234&date=2021-04-05&time=08:00'):
+    """
+    Genera carga contra un PredictionServer con conexiones persistentes y mide la latencia
+
+    Parámetros
+    ----------
+    host: str
+        dirección del servicio
+    port: int
+        puerto del servicio
+    duration: float, opcional
+        segundos de carga (el valor predeterminado es 10)
+    concurrency: int, opcional
+        número de conexiones simultáneas, cada una con una solicitud en curso (el valor predeterminado es 16)
+    target: str, opcional
+        ruta GET que se solicita
+    Devoluciones
+    -------
+    Devuelve un diccionario con requests, errors, rps, p50_ms, p99_ms y max_ms
+    """
+    import asyncio
+    
+    request = 'GET {} HTTP/1.1\r\nHost: {}\r\n\r\n'.format(target, host).encode('latin-1')
+    latencies = []
+    errors = 0
+    deadline = _time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while _time.perf_counter() < deadline:
+                start = _time.perf_counter()
+                writer.write(request)
+                head = await reader.readuntil(b'\r\n\r\n')
+                length = 0
+                for line in head.split(b'\r\n')[1:]:
+                    if line.lower().startswith(b'content-length:'):
+                        length = int(line.split(b':', 1)[1])
+                await reader.readexactly(length)
+                latencies.append(_time.perf_counter() - start)
+                if not head.startswith(b'HTTP/1.1 200'):
+                    errors += 1
+        finally:
+            writer.close()
+
+    started = _time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = _time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else None
+
+    return {'requests': len(latencies), 'errors': errors, 'rps': len(latencies) / elapsed,
+            'p50_ms': percentile(0.50), 'p99_ms': percentile(0.99), 'max_ms': percentile(1.0)}
+
+
+def _mock_holiday_api():
+    """
+    Devuelve un manejador HTTP que imita la API de vacaciones de abstractapi para las
+    mediciones del modo en línea: el 1 de enero es feriado y los demás días no
+    """
+    import http.server
+    import urllib.parse
+
+    class _MockHolidayAPI(http.server.BaseHTTPRequestHandler):
+        """
+        Servidor local que imita la API de vacaciones de abstractapi para las mediciones del
+        modo en línea: el 1 de enero es feriado y los demás días no
+        """
+        protocol_version = 'HTTP/1.1'
+        # Evita que el algoritmo de Nagle retrase el cuerpo enviado después de las cabeceras
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+            holiday = query.get('day') in ('1', '01') and query.get('month') in ('1', '01')
+            data = json.dumps([{'name': "New Year's Day"}] if holiday else []).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return _MockHolidayAPI
+
+
+def _per_call_us(func, number, repeat=9):
+    """Devuelve la mediana de repeat tiempos por llamada de una función, en microsegundos"""
+    import statistics
+    import timeit
+    
+    return statistics.median(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def run_benchmarks(sizes=(10000, 1000000, 10000000), year=2021):
+    """
+    Mide los caminos críticos de PicoPlaca y HolidayEcuador de forma reproducible
+
+    Parámetros
+    ----------
+    sizes: iterable de int, opcional
+        cantidades de registros de las mediciones por lotes
+    year: int, opcional
+        año de las fechas usadas (el valor predeterminado es 2021)
+    Devoluciones
+    -------
+    Devuelve un diccionario serializable como JSON con meta (entorno) y results
+    {nombre: {"value": valor, "unit": unidad, "higher_is_better": booleano}}
+    """
+    import http.server
+    import platform
+    import statistics
+    import subprocess
+    import timeit
+    import numpy as np
+    
+    results = {}
+
+    def record(name, value, unit, higher_is_better=False):
+        results[name] = {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+    # Latencia de predict() por caso, con los calendarios ya en la cache
+    holiday_cache.warm_up([year])
+    weekday = datetime.date(year, 4, 5)
+    while weekday.weekday() != 0:
+        weekday += datetime.timedelta(days=1)
+    cases = {
+        'exempt': ('PAA-1231', weekday.isoformat(), '08:00'),
+        'holiday': ('PBX-1231', '{}-01-01'.format(year), '08:00'),
+        'off_peak': ('PBX-1231', weekday.isoformat(), '12:00'),
+        'restricted': ('PBX-1231', weekday.isoformat(), '08:00'),
+    }
+    for case, (plate, date, time) in cases.items():
+        record('predict.{}'.format(case), _per_call_us(lambda: PicoPlaca(plate, date, time).predict(), 2000), 'us')
+
+    # Construcción de calendarios
+    record('holiday_ecuador.construct_populate_year',
+           _per_call_us(lambda: len(_holiday_ecuador()(prov='EC-P', years=year)), 200), 'us')
+    record('holiday_rules.year', _per_call_us(lambda: ecuador_rules.year(year, 'EC-P'), 2000), 'us')
+
+    # Rendimiento por lotes
+    pool = 10000
+    rng = np.random.default_rng(0)
+    letters = np.array(list('ABCGPUXZ'))
+    plates = np.char.add(np.char.add(np.char.add(rng.choice(letters, pool), rng.choice(letters, pool)),
+                                     np.char.add(rng.choice(letters, pool), '-')),
+                         np.char.zfill(rng.integers(0, 10000, pool).astype(str), 4))
+    dates = (np.datetime64('{}-01-01'.format(year)) + rng.integers(0, 365, pool)).astype('U10')
+    times = np.char.add(np.char.add(np.char.zfill(rng.integers(0, 24, pool).astype(str), 2), ':'),
+                        np.char.zfill(rng.integers(0, 60, pool).astype(str), 2))
+    for size in sizes:
+        index = np.arange(size) % pool
+        batch = (plates[index], dates[index], times[index])
+        elapsed = statistics.median(timeit.repeat(lambda batch=batch: PicoPlaca.predict_many(*batch),
+                                                  number=1, repeat=5))
+        record('predict_many.{}'.format(size), size / elapsed, 'records/s', True)
+        del batch, index
+
+    # Detector de infracciones sobre un flujo de eventos desordenados con lecturas repetidas
+    start_epoch = int(datetime.datetime(year, 4, 5, tzinfo=QUITO_TZ).timestamp())
+    offsets = np.sort(rng.integers(0, 7 * 86400, 200000)) + rng.integers(0, 30, 200000)
+    events = list(zip(plates[np.arange(200000) % pool].tolist(), (start_epoch + offsets).tolist(),
+                      rng.integers(0, 50, 200000).tolist()))
+    elapsed = statistics.median(timeit.repeat(lambda: sum(1 for _ in ViolationDetector().run(events)),
+                                              number=1, repeat=5))
+    record('violations.events', len(events) / elapsed, 'events/s', True)
+
+    # Arranque en frío de la línea de comandos, sin consultar a un proceso persistente que pudiera estar escuchando
+    command = [sys.executable, ENTRY_SCRIPT, '--sin-worker', '-l', 'PBX-1231', '-f', weekday.isoformat(), '-t', '08:00']
+    elapsed = []
+    for _ in range(9):
+        start = _time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        elapsed.append(_time.perf_counter() - start)
+    record('cli.cold_start', statistics.median(elapsed) * 1000, 'ms')
+
+    # Modo en línea contra un servidor local
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _mock_holiday_api())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = AbstractHolidayClient(api_key='benchmark', base_url='http://127.0.0.1:{}/v1/'.format(
+            server.server_address[1]), cache_path=':memory:', rate=1e9, monthly_quota=10 ** 9)
+        days = [(datetime.date(year, 1, 1) + datetime.timedelta(days=i)).isoformat() for i in range(365)]
+        start = _time.perf_counter()
+        for day in days:
+            client.is_holiday(day)
+        record('online.miss', (_time.perf_counter() - start) / len(days) * 1e6, 'us')
+        record('online.cache_hit', _per_call_us(lambda: client.is_holiday(days[100]), 2000), 'us')
+        client.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    meta = {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+            'machine': platform.machine(), 'system': platform.system(), 'numpy': np.__version__,
+            'cpus': os.cpu_count(), 'timestamp': datetime.datetime.now().isoformat(timespec='seconds')}
+    return {'meta': meta, 'results': results}
+
+
+# Empeoramiento relativo permitido por prefijo de medición; las que dependen de procesos, disco
+# o sockets varían más entre ejecuciones que los cálculos en memoria
+BENCHMARK_TOLERANCES = {
+    '': 0.15,
+    'cli.': 0.30,
+    'online.': 0.30,
+    'violations.': 0.20,
+    'holiday_ecuador.': 0.20,
+}
+
+
+def compare_benchmarks(current, baseline, tolerance=None):
+    """
+    Compara resultados de run_benchmarks con una línea base
+
+    Parámetros
+    ----------
+    current: dict
+        resultados actuales
+    baseline: dict
+        resultados de referencia guardados
+    tolerance: float o dict, opcional
+        empeoramiento relativo permitido para todas las mediciones, o un diccionario
+        {prefijo: tolerancia} donde se usa el prefijo más largo que coincida con el nombre
+        (el valor predeterminado es BENCHMARK_TOLERANCES)
+    Devoluciones
+    -------
+    Devuelve una lista de tuplas (nombre, valor base, valor actual, cambio relativo) con
+    las mediciones que empeoraron más que la tolerancia
+    """
+    if tolerance is None:
+        tolerance = BENCHMARK_TOLERANCES
+    if not isinstance(tolerance, dict):
+        tolerance = {'': tolerance}
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base or not base['value']:
+            continue
+        change = (result['value'] - base['value']) / base['value']
+        worse = -change if result['higher_is_better'] else change
+        prefix = max((prefix for prefix in tolerance if name.startswith(prefix)), key=len, default=None)
+        if prefix is not None and worse > tolerance[prefix]:
+            regressions.append((name, base['value'], result['value'], change))
+    return regressions
+
+
+def _host_port(value):
+    """Interpreta un argumento [HOST:]PUERTO de la línea de comandos"""
+    host, _, port = value.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def worker_socket_path():
+    """
+    Ruta del socket Unix del proceso de predicción persistente: la variable de entorno
+    PICOPLACA_SOCKET, o picoplaca-<uid>.sock en XDG_RUNTIME_DIR (o /tmp)
+    """
+    path = os.environ.get('PICOPLACA_SOCKET')
+    if path:
+        return path
+    base = os.environ.get('XDG_RUNTIME_DIR') or '/tmp'
+    return os.path.join(base, 'picoplaca-{}.sock'.format(os.getuid()))
+
+
+def _own_socket(path):
+    """
+    Devuelve el os.stat_result de path si es un socket del usuario actual sin permisos para
+    nadie más (modo 0600 o menor), de lo contrario None; otro usuario podría haber creado
+    la ruta antes para responder con veredictos falsos
+    """
+    import stat
+
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid() or stat.S_IMODE(st.st_mode) & 0o077:
+        return None
+    return st
+
+
+async def serve_worker(path=None, years=None):
+    """
+    Proceso de predicción persistente: atiende por un socket Unix una consulta JSON por
+    línea {"plate", "date", "time", "online", "prov"} y responde {"allowed": bool} o
+    {"error": mensaje}, con el intérprete y los calendarios ya cargados
+
+    Parámetros
+    ----------
+    path: str, opcional
+        ruta del socket (por defecto worker_socket_path())
+    years: iterable, opcional
+        años cuyos calendarios se precargan (por defecto el anterior, el actual y el siguiente)
+    Aumenta
+    ------
+    ValorError
+        Si ya hay un proceso escuchando en la ruta o la ruta existe y no es un socket propio
+    """
+    import asyncio
+    import signal
+    import socket
+
+    path = path or worker_socket_path()
+    if years is None:
+        today = datetime.date.today().year
+        years = range(today - 1, today + 2)
+    holiday_cache.warm_up(years)
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    query = json.loads(line)
+                    pyp = PicoPlaca(query['plate'], query['date'], query['time'],
+                                    bool(query.get('online', False)), query.get('prov', 'EC-P'))
+                    reply = {'allowed': pyp.predict()}
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {'error': str(e)}
+                writer.write(json.dumps(reply).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    if os.path.lexists(path):
+        if _own_socket(path) is None:
+            raise ValueError('La ruta {} existe y no es un socket propio con permisos 0600'.format(path))
+        # Sólo se reemplaza un socket abandonado, no el de un proceso que sigue escuchando
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(path)
+            except OSError:
+                os.unlink(path)
+            else:
+                raise ValueError('Ya hay un proceso persistente escuchando en {}'.format(path))
+    # El socket se crea ya con permisos 0600, sin un intervalo en que otros puedan conectarse
+    umask = os.umask(0o177)
+    try:
+        server = await asyncio.start_unix_server(handle, path)
+    finally:
+        os.umask(umask)
+    inode = os.lstat(path).st_ino
+    # SIGTERM detiene el proceso de forma ordenada, borrando el socket
+    stopped = asyncio.get_running_loop().create_future()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set_result, None)
+    try:
+        async with server:
+            await stopped
+    finally:
+        own = _own_socket(path)
+        if own is not None and own.st_ino == inode:
+            os.unlink(path)
+
+
+def query_worker(plate, date, time, online=False, prov='EC-P', path=None, timeout=2.0):
+    """
+    Consulta al proceso de predicción persistente, si hay uno escuchando
+
+    Parámetros
+    ----------
+    plate, date, time: str
+        la placa, la fecha y la hora, como en PicoPlaca
+    online: booleano, opcional
+        si online == Verdadero, el proceso utilizará la API de días festivos abstractos
+    prov: str, opcional
+        código de provincia según ISO3166-2
+    path: str, opcional
+        ruta del socket (por defecto worker_socket_path())
+    timeout: float, opcional
+        segundos de espera de la respuesta
+    Devoluciones
+    -------
+    True o False como PicoPlaca.predict, o None si no hay un proceso disponible o el socket
+    no pertenece al usuario actual (ruta, permisos 0600 y credenciales del proceso)
+    Aumenta
+    ------
+    ValorError
+        Si el proceso rechaza la consulta
+    """
+    import socket
+
+    path = path or worker_socket_path()
+    if _own_socket(path) is None:
+        return None
+    query = {'plate': plate, 'date': date, 'time': time, 'online': online, 'prov': prov}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            if hasattr(socket, 'SO_PEERCRED'):
+                # El proceso del otro extremo también debe ser del usuario actual
+                _, uid, _ = struct.unpack('3i', sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                                                                 struct.calcsize('3i')))
+                if uid != os.getuid():
+                    return None
+            sock.sendall(json.dumps(query).encode('utf-8') + b'\n')
+            with sock.makefile('rb') as stream:
+                line = stream.readline()
+    except OSError:
+        return None
+    if not line:
+        return None
+    reply = json.loads(line)
+    if 'error' in reply:
+        raise ValueError(reply['error'])
+    return reply['allowed']
+
+
+# Script de línea de comandos que llama a main; este módulo contiene toda la biblioteca para
+# que Python guarde su bytecode compilado y cada invocación no lo vuelva a compilar
+ENTRY_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '[NRC_6181] JordanGuevara_Lab4Unidad1.py')
+
+
+def main(argv=None):
+    """
+    Punto de entrada de la línea de comandos
+
+    Parámetros
+    ----------
+    argv: lista de str, opcional
+        argumentos (por defecto los de sys.argv)
+    """
+    parser = argparse.ArgumentParser(
+        description='Pico y Placa Quito Predictor:  Verifique si el vehículo con la placa proporcionada puede estar en la carretera en la fecha y hora correspondiente')
+    parser.add_argument(
+        '-o',
+        '--online',
+        action='store_true',
+        help='usar la API abstract de vacaciones')
+    parser.add_argument(
+        '-l',
+        '--lámina',
+        dest='plate',
+        help='la placa del vehículo: XXX-YYYY o XX-YYYY, donde X es una letra mayuscula e Y es un digito')
+    parser.add_argument(
+        '-f',
+        '--fecha',
+        dest='date',
+        help='la fecha a comprobar: AAAA-MM-DD')
+    parser.add_argument(
+        '-t',
+        '--time',
+        help='la hora a comprobar: HH:MM')
+    parser.add_argument(
+        '-b',
+        '--lote',
+        dest='batch',
+        help='archivo CSV o JSONL con un registro placa, fecha, hora por línea ("-" para la entrada estándar)')
+    parser.add_argument(
+        '--sincronizar',
+        dest='sync',
+        type=int,
+        nargs='+',
+        metavar='AÑO',
+        help='descargar los feriados de la API abstract de los años indicados e informar las diferencias con el calendario fuera de línea')
+    parser.add_argument(
+        '--granularidad',
+        dest='granularity',
+        choices=('year', 'month'),
+        default='month',
+        help='una solicitud por año o por mes al sincronizar (por defecto month)')
+    parser.add_argument(
+        '--servir',
+        dest='serve',
+        metavar='[HOST:]PUERTO',
+        help='iniciar el servicio HTTP de predicción en la dirección indicada')
+    parser.add_argument(
+        '--metricas',
+        dest='metrics',
+        action='store_true',
+        help='con --servir, instrumentar las predicciones y exponer /metrics')
+    parser.add_argument(
+        '--carga',
+        dest='load',
+        metavar='[HOST:]PUERTO',
+        help='generar carga contra un servicio HTTP de predicción y medir la latencia p50/p99')
+    parser.add_argument(
+        '--duracion',
+        dest='duration',
+        type=float,
+        default=10.0,
+        help='segundos de carga (por defecto 10)')
+    parser.add_argument(
+        '--concurrencia',
+        dest='concurrency',
+        type=int,
+        default=16,
+        help='conexiones simultáneas de la carga (por defecto 16)')
+    parser.add_argument(
+        '--benchmark',
+        nargs='?',
+        const='-',
+        metavar='SALIDA.json',
+        help='ejecutar las mediciones de rendimiento y escribir los resultados JSON ("-" o sin valor para la salida estándar)')
+    parser.add_argument(
+        '--linea-base',
+        dest='baseline',
+        metavar='BASE.json',
+        help='resultados de referencia con los que comparar las mediciones; termina con error si alguna empeora')
+    parser.add_argument(
+        '--tolerancia',
+        dest='tolerance',
+        type=float,
+        help='empeoramiento relativo permitido frente a la línea base para todas las mediciones '
+             '(por defecto entre 0.15 y 0.30 según la medición)')
+    parser.add_argument(
+        '--tamanos',
+        dest='sizes',
+        type=int,
+        nargs='+',
+        default=[10000, 1000000, 10000000],
+        help='cantidades de registros de las mediciones por lotes (por defecto 10000 1000000 10000000)')
+    parser.add_argument(
+        '--reglas',
+        dest='rules',
+        metavar='REGLAS.json',
+        help='archivo JSON con las reglas de restricción y sus fechas de vigencia; con --servir o --worker se vuelve a cargar cuando cambia')
+    parser.add_argument(
+        '--worker',
+        action='store_true',
+        help='iniciar un proceso persistente que atiende las consultas de la línea de comandos por un socket Unix')
+    parser.add_argument(
+        '--sin-worker',
+        dest='no_worker',
+        action='store_true',
+        help='no consultar al proceso persistente aunque esté en ejecución')
+    parser.add_argument(
+        '--socket',
+        metavar='RUTA',
+        help='ruta del socket Unix del proceso persistente (por defecto $PICOPLACA_SOCKET o picoplaca-<uid>.sock)')
+    parser.add_argument(
+        '--camaras',
+        dest='events',
+        metavar='EVENTOS',
+        help='archivo CSV o JSONL de eventos de cámaras placa, epoch, cámara ("-" para la entrada estándar); escribe sólo las infracciones')
+    parser.add_argument(
+        '--ventana',
+        dest='window',
+        type=float,
+        default=60.0,
+        help='con --camaras, segundos de tolerancia a eventos desordenados (por defecto 60)')
+    parser.add_argument(
+        '--supresion',
+        dest='dedup',
+        type=float,
+        default=300.0,
+        help='con --camaras, segundos durante los que no se repite la infracción de una placa (por defecto 300)')
+    parser.add_argument(
+        '--formato',
+        dest='format',
+        choices=('csv', 'jsonl'),
+        help='formato del lote o de los eventos (por defecto se deduce de la extensión del archivo, o csv)')
+    args = parser.parse_args(argv)
+
+    if args.rules is not None:
+        try:
+            load_restrictions(args.rules)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        if args.serve is not None or args.worker:
+            RestrictionWatcher(args.rules).start()
+
+    if args.benchmark is not None:
+        report = run_benchmarks(args.sizes)
+        if args.benchmark == '-':
+            print(json.dumps(report, indent=2))
+        else:
+            with open(args.benchmark, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        if args.baseline is not None:
+            with open(args.baseline, encoding='utf-8') as f:
+                regressions = compare_benchmarks(report, json.load(f), args.tolerance)
+            for name, base, value, change in regressions:
+                print('REGRESIÓN {}: {:.4g} -> {:.4g} ({:+.1%})'.format(name, base, value, change), file=sys.stderr)
+            sys.exit(1 if regressions else 0)
+        sys.exit(0)
+
+    if args.worker:
+        import asyncio
+
+        try:
+            asyncio.run(serve_worker(args.socket))
+        except KeyboardInterrupt:
+            pass
+        except ValueError as e:
+            parser.error(str(e))
+        sys.exit(0)
+
+    if args.serve is not None:
+        import asyncio
+
+        host, port = _host_port(args.serve)
+        if args.metrics:
+            enable_metrics()
+        try:
+            asyncio.run(PredictionServer(host, port).serve_forever())
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+
+    if args.load is not None:
+        import asyncio
+
+        host, port = _host_port(args.load)
+        print(json.dumps(asyncio.run(run_load(host, port, args.duration, args.concurrency)), indent=2))
+        sys.exit(0)
+
+    if args.sync is not None:
+        client = online_client()
+        for year, days in client.sync(args.sync, args.granularity).items():
+            print('{}: {} feriados sincronizados'.format(year, len(days)))
+        for date, api_name, offline_name in client.compare_offline(args.sync):
+            print('{}: API={} fuera de línea={}'.format(date, api_name or '-', offline_name or '-'))
+        sys.exit(0)
+
+    if args.events is not None:
+        fmt = args.format
+        if fmt is None:
+            fmt = 'jsonl' if args.events.endswith(('.jsonl', '.json')) else 'csv'
+        if args.events == '-':
+            stats = run_events(sys.stdin, sys.stdout, fmt, args.window, args.dedup)
+        else:
+            with open(args.events, newline='', encoding='utf-8') as stream:
+                stats = run_events(stream, sys.stdout, fmt, args.window, args.dedup)
+        print(json.dumps(stats), file=sys.stderr)
+        sys.exit(0)
+
+    if args.batch is not None:
+        fmt = args.format
+        if fmt is None:
+            fmt = 'jsonl' if args.batch.endswith(('.jsonl', '.json')) else 'csv'
+        if args.batch == '-':
+            errors = run_batch(sys.stdin, sys.stdout, sys.stderr, fmt, args.online)
+        else:
+            with open(args.batch, newline='', encoding='utf-8') as stream:
+                errors = run_batch(stream, sys.stdout, sys.stderr, fmt, args.online)
+        sys.exit(1 if errors else 0)
+
+    if args.plate is None or args.date is None or args.time is None:
+        parser.error('se requieren -l/--lámina, -f/--fecha y -t/--time, o bien -b/--lote')
+
+    allowed = None
+    if not args.no_worker and args.rules is None:
+        # Un proceso persistente ya tiene el intérprete y los calendarios cargados
+        allowed = query_worker(args.plate, args.date, args.time, args.online, path=args.socket)
+    if allowed is None:
+        allowed = PicoPlaca(args.plate, args.date, args.time, args.online).predict()
+
+    if allowed:
+        print(
+            'El vehículo con la siguiente placa {} PUEDE estar en la siguiente carretera que es el {} y {}.'.format(
+                args.plate,
+                args.date,
+                args.time))
+    else:
+        print(
+            'El vehículo con matrícula {} NO DEBE estar en la carretera de {} a {}.'.format(
+                args.plate,
+                args.date,
+                args.time))
+
+
+if __name__ == '__main__':
+    main()
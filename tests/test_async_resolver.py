@@ -0,0 +1,117 @@
+"""
+Pruebas de AsyncHolidayResolver con un cliente lento que cuenta las consultas simultáneas.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from picoplaca import AsyncHolidayResolver, PicoPlaca, disable_metrics, enable_metrics
+
+
+class SlowClient:
+    """Cliente bloqueante que tarda delay segundos y registra la concurrencia máxima"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def is_holiday(self, date):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            return True
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def lookup(self, date):
+        return self.is_holiday(date), False
+
+
+class AsyncHolidayResolverTest(unittest.TestCase):
+
+    def test_timed_out_lookups_keep_their_slot(self):
+        client = SlowClient(delay=0.3)
+
+        async def run():
+            resolver = AsyncHolidayResolver(client, max_concurrency=2, timeout=0.05)
+            try:
+                dates = ['2021-01-{:02d}'.format(day) for day in range(4, 12)]
+                # Tras el tiempo límite se responde con el calendario fuera de línea (no son feriados)
+                return await asyncio.gather(*(resolver.is_holiday(date) for date in dates))
+            finally:
+                resolver.close()
+
+        self.assertEqual(asyncio.run(run()), [False] * 8)
+        time.sleep(0.4)
+        self.assertLessEqual(client.peak, 2)
+
+    def test_concurrent_lookups_of_a_date_share_one_request(self):
+        client = SlowClient(delay=0.05)
+
+        async def run():
+            resolver = AsyncHolidayResolver(client, timeout=1.0)
+            try:
+                return await asyncio.gather(*(resolver.is_holiday('2021-01-04') for _ in range(5)))
+            finally:
+                resolver.close()
+
+        self.assertEqual(asyncio.run(run()), [True] * 5)
+        self.assertEqual(client.calls, 1)
+
+    def test_offline_fallback_uses_the_requested_province(self):
+        client = SlowClient(delay=0.3)
+
+        async def run():
+            resolver = AsyncHolidayResolver(client, timeout=0.05)
+            try:
+                # 2021-07-26: Fundación de Guayaquil trasladada, feriado sólo en Guayas
+                holidays = await asyncio.gather(resolver.is_holiday('2021-07-26', 'EC-G'),
+                                                resolver.is_holiday('2021-07-26', 'EC-P'))
+                verdicts = await PicoPlaca.predict_many_async(
+                    ['GBC-1231'], ['2021-07-26'], ['08:00'], online=True, resolver=resolver, prov='EC-G')
+                return holidays, verdicts
+            finally:
+                resolver.close()
+
+        self.assertEqual(asyncio.run(run()), ([True, False], [True]))
+        self.assertFalse(PicoPlaca('GBC-1231', '2021-07-26', '08:00', prov='EC-P').predict())
+
+    def test_predict_async_records_metrics(self):
+        client = SlowClient(delay=0.01)
+
+        async def run():
+            resolver = AsyncHolidayResolver(client, timeout=1.0)
+            try:
+                online = await PicoPlaca('PBX-1231', '2021-04-05', '08:00', online=True).predict_async(resolver)
+                offline = await PicoPlaca('PBX-1231', '2021-04-05', '08:00').predict_async(resolver)
+                return online, offline
+            finally:
+                resolver.close()
+
+        metrics = enable_metrics()
+        try:
+            # El cliente lento responde que todas las fechas son feriado
+            self.assertEqual(asyncio.run(run()), (True, False))
+        finally:
+            disable_metrics()
+        text = metrics.to_prometheus()
+        self.assertIn('picoplaca_verdicts_total{stage="holiday",allowed="true"} 1', text)
+        self.assertIn('picoplaca_verdicts_total{stage="weekday",allowed="false"} 1', text)
+        self.assertIn('source="online",cache="miss"', text)
+        self.assertIn('source="offline"', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
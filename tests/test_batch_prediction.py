@@ -0,0 +1,48 @@
+"""
+Pruebas de PicoPlaca.predict_many y predict_parallel frente a predict registro por registro.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from picoplaca import PicoPlaca
+
+RECORDS = [
+    ('PBX-1231', '2021-04-05', '08:00'),
+    ('PBX-1234', '2021-04-05', '08:00'),
+    ('PAA-1231', '2021-04-05', '08:00'),
+    ('PBX-1231', '2021-04-05', '12:00'),
+    ('PBX-1231', '2021-01-01', '08:00'),
+    ('GB-1239', '2021-04-09', '17:30'),
+]
+
+
+class BatchPredictionTest(unittest.TestCase):
+
+    def test_matches_predict(self):
+        plates, dates, times = zip(*RECORDS)
+        self.assertEqual(PicoPlaca.predict_many(plates, dates, times).tolist(),
+                         [PicoPlaca(*record).predict() for record in RECORDS])
+
+    def test_record_counts_are_compared_after_flattening(self):
+        with self.assertRaises(ValueError):
+            PicoPlaca.predict_many([['PBX-1234', 'PBX-1234']], ['2021-04-05'], ['08:00'])
+
+    def test_parallel_error_reports_position_in_the_whole_batch(self):
+        plates = ['PBX-1234'] * 8000
+        plates[7000] = 'pbx-1234'
+        with self.assertRaises(ValueError) as raised:
+            PicoPlaca.predict_parallel(plates, ['2021-04-05'] * 8000, ['08:00'] * 8000,
+                                       workers=2, chunksize=3000)
+        self.assertIn('(registro 7000)', str(raised.exception))
+
+    def test_parallel_matches_predict_many(self):
+        plates, dates, times = (list(values) * 500 for values in zip(*RECORDS))
+        self.assertEqual(PicoPlaca.predict_parallel(plates, dates, times, workers=2, chunksize=1000).tolist(),
+                         PicoPlaca.predict_many(plates, dates, times).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
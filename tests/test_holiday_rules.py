@@ -0,0 +1,187 @@
+"""
+Equivalencia de las reglas declarativas de feriados (ecuador_rules) con el _populate
+original de HolidayEcuador, congelado aquí como referencia, para todos los años de 1950 a 2100.
+"""
+import datetime
+import os
+import sys
+import unittest
+
+from dateutil.easter import easter
+from dateutil.relativedelta import relativedelta as rd, FR
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from picoplaca import ecuador_rules, JAN, MAY, AUG, OCT, NOV, DEC
+
+YEARS = range(1950, 2101)
+
+
+def legacy_populate(year, prov='ON'):
+    """
+    Copia fiel del HolidayEcuador._populate original (antes de las reglas declarativas),
+    incluidos sus errores: con la LOSEP, el 24 de mayo en sábado o martes y el 6 de diciembre
+    en domingo lanzan TypeError. Devuelve la lista de asignaciones (fecha, nombre) en orden.
+    """
+    calendar = []
+
+    class Recorder:
+        def __setitem__(self, date, name):
+            calendar.append((date, name))
+
+    self = Recorder()
+    self.prov = prov
+
+    # Día de Año Nuevo
+    self[datetime.date(year, JAN, 1)] = "Año Nuevo [New Year's Day]"
+
+    # Navidad
+    self[datetime.date(year, DEC, 25)] = "Feliz Navidad [Merry Christmas]"
+
+    # semana santa
+    self[easter(year) + rd(weekday=FR(-1))] = "Semana Santa (Viernes Santo) [Good Friday)]"
+    self[easter(year)] = "Día de Pascuas (Dia del Conejo de Pascua) [Easter Day]"
+
+    # Carnival
+    total_lent_days = 46
+    self[easter(year) - datetime.timedelta(days=total_lent_days+2)] = "Lunes de carnaval [Carnival of Monday)]"
+    self[easter(year) - datetime.timedelta(days=total_lent_days+1)] = "Martes de carnaval [Tuesday of Carnival)]"
+
+    # Labor day
+    name = "Día Nacional del Trabajo [Labour Day]"
+    if year > 2015 and datetime.date(year, MAY, 1).weekday() in (5, 1):
+        self[datetime.date(year, MAY, 1) - datetime.timedelta(days=1)] = name
+    elif year > 2015 and datetime.date(year, MAY, 1).weekday() == 6:
+        self[datetime.date(year, MAY, 1) + datetime.timedelta(days=1)] = name
+    elif year > 2015 and datetime.date(year, MAY, 1).weekday() in (2, 3):
+        self[datetime.date(year, MAY, 1) + rd(weekday=FR)] = name
+    else:
+        self[datetime.date(year, MAY, 1)] = name
+
+    # Batalla de Pichincha, las reglas son las mismas que el día del trabajo
+    name = "Batalla del Pichincha [Pichincha Battle]"
+    if year > 2015 and datetime.date(year, MAY, 24).weekday() in (5, 1):
+        self[datetime.date(year, MAY, 24).weekday() - datetime.timedelta(days=1)] = name
+    elif year > 2015 and datetime.date(year, MAY, 24).weekday() == 6:
+        self[datetime.date(year, MAY, 24) + datetime.timedelta(days=1)] = name
+    elif year > 2015 and datetime.date(year, MAY, 24).weekday() in (2, 3):
+        self[datetime.date(year, MAY, 24) + rd(weekday=FR)] = name
+    else:
+        self[datetime.date(year, MAY, 24)] = name
+
+    # First Cry of Independence, the rules are the same as the labor day
+    name = "Primer Grito de la Independencia [First Cry of Independence]"
+    if year > 2015 and datetime.date(year, AUG, 10).weekday() in (5, 1):
+        self[datetime.date(year, AUG, 10) - datetime.timedelta(days=1)] = name
+    elif year > 2015 and datetime.date(year, AUG, 10).weekday() == 6:
+        self[datetime.date(year, AUG, 10) + datetime.timedelta(days=1)] = name
+    elif year > 2015 and datetime.date(year, AUG, 10).weekday() in (2, 3):
+        self[datetime.date(year, AUG, 10) + rd(weekday=FR)] = name
+    else:
+        self[datetime.date(year, AUG, 10)] = name
+
+    # Independencia de Guayaquil, las reglas son las mismas que el día del trabajo
+    name = "Independencia de Guayaquil [Guayaquil's Independence]"
+    if year > 2015 and datetime.date(year, OCT, 9).weekday() in (5, 1):
+        self[datetime.date(year, OCT, 9) - datetime.timedelta(days=1)] = name
+    elif year > 2015 and datetime.date(year, OCT, 9).weekday() == 6:
+        self[datetime.date(year, OCT, 9) + datetime.timedelta(days=1)] = name
+    elif year > 2015 and datetime.date(year, MAY, 1).weekday() in (2, 3):
+        self[datetime.date(year, OCT, 9) + rd(weekday=FR)] = name
+    else:
+        self[datetime.date(year, OCT, 9)] = name
+
+    # Dia de lso difuntos
+    namedd = "Día de los difuntos [Dia de los muertos]"
+    # Independence de Cuenca
+    nameic = "Independencia de Cuenca [Independence of Cuenca]"
+    if (datetime.date(year, NOV, 2).weekday() == 5 and datetime.date(year, NOV, 3).weekday() == 6):
+        self[datetime.date(year, NOV, 2) - datetime.timedelta(days=1)] = namedd
+        self[datetime.date(year, NOV, 3) + datetime.timedelta(days=1)] = nameic
+    elif (datetime.date(year, NOV, 3).weekday() == 2):
+        self[datetime.date(year, NOV, 2)] = namedd
+        self[datetime.date(year, NOV, 3) - datetime.timedelta(days=2)] = nameic
+    elif (datetime.date(year, NOV, 3).weekday() == 3):
+        self[datetime.date(year, NOV, 3)] = nameic
+        self[datetime.date(year, NOV, 2) + datetime.timedelta(days=2)] = namedd
+    elif (datetime.date(year, NOV, 3).weekday() == 5):
+        self[datetime.date(year, NOV, 2)] = namedd
+        self[datetime.date(year, NOV, 3) - datetime.timedelta(days=2)] = nameic
+    elif (datetime.date(year, NOV, 3).weekday() == 0):
+        self[datetime.date(year, NOV, 3)] = nameic
+        self[datetime.date(year, NOV, 2) + datetime.timedelta(days=2)] = namedd
+    else:
+        self[datetime.date(year, NOV, 2)] = namedd
+        self[datetime.date(year, NOV, 3)] = nameic
+
+    # Fundación de Quito, aplica solo para la provincia de Pichincha,
+    # las reglas son las mismas que el día del trabajo
+    name = "Fundación de Quito [Foundation of Quito]"
+    if self.prov in ("EC-P"):
+        if year > 2015 and datetime.date(year, DEC, 6).weekday() in (5, 1):
+            self[datetime.date(year, DEC, 6) - datetime.timedelta(days=1)] = name
+        elif year > 2015 and datetime.date(year, DEC, 6).weekday() == 6:
+            self[(datetime.date(year, DEC, 6).weekday()) + datetime.timedelta(days=1)] = name
+        elif year > 2015 and datetime.date(year, DEC, 6).weekday() in (2, 3):
+            self[datetime.date(year, DEC, 6) + rd(weekday=FR)] = name
+        else:
+            self[datetime.date(year, DEC, 6)] = name
+    return calendar
+
+
+def rules_calendar(year, prov):
+    """Feriados de ecuador_rules como lista ordenada de (fecha, nombre)"""
+    return sorted((datetime.date.fromordinal(ordinal), name) for ordinal, name in ecuador_rules.year(year, prov))
+
+
+def legacy_fails(year, prov):
+    """Años en que el _populate original lanza TypeError (ver legacy_populate)"""
+    if year <= 2015:
+        return False
+    pichincha = datetime.date(year, MAY, 24).weekday() in (5, 1)
+    quito = prov == 'EC-P' and datetime.date(year, DEC, 6).weekday() == 6
+    return pichincha or quito
+
+
+class HolidayRulesEquivalenceTest(unittest.TestCase):
+
+    def test_matches_legacy_populate(self):
+        # 'ON' era la provincia por defecto del HolidayEcuador original: sólo feriados nacionales
+        for prov, legacy_prov in (('EC-P', 'EC-P'), (None, 'ON')):
+            for year in YEARS:
+                if legacy_fails(year, prov):
+                    continue
+                with self.subTest(prov=prov, year=year):
+                    self.assertEqual(rules_calendar(year, prov), sorted(legacy_populate(year, legacy_prov)))
+
+    def test_legacy_failures_are_the_expected_years(self):
+        failing = [year for year in YEARS if legacy_fails(year, 'EC-P')]
+        self.assertEqual(len(failing), 36)
+        for year in YEARS:
+            with self.subTest(year=year):
+                if legacy_fails(year, 'EC-P'):
+                    with self.assertRaises(TypeError):
+                        legacy_populate(year, 'EC-P')
+                else:
+                    legacy_populate(year, 'EC-P')
+
+    def test_losep_shift_in_years_the_legacy_code_could_not_build(self):
+        # LOSEP: sábado o martes al viernes o lunes anterior, domingo al lunes siguiente
+        shift = {5: -1, 1: -1, 6: 1}
+        for year in YEARS:
+            if not legacy_fails(year, 'EC-P'):
+                continue
+            calendar = dict((name, date) for date, name in rules_calendar(year, 'EC-P'))
+            with self.subTest(year=year):
+                pichincha = datetime.date(year, MAY, 24)
+                if pichincha.weekday() in (5, 1):
+                    self.assertEqual(calendar["Batalla del Pichincha [Pichincha Battle]"],
+                                     pichincha + datetime.timedelta(days=shift[pichincha.weekday()]))
+                quito = datetime.date(year, DEC, 6)
+                if quito.weekday() == 6:
+                    self.assertEqual(calendar["Fundación de Quito [Foundation of Quito]"],
+                                     quito + datetime.timedelta(days=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
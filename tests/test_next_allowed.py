@@ -0,0 +1,48 @@
+"""
+Pruebas de PicoPlaca.next_allowed.
+"""
+import datetime
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from picoplaca import PicoPlaca
+
+
+class NextAllowedTest(unittest.TestCase):
+
+    def setUp(self):
+        # Lunes 2021-04-05: el dígito 1 no puede circular de 07:00 a 09:30 y de 16:00 a 19:30
+        self.pyp = PicoPlaca('PBX-1231', '2021-04-05', '08:00')
+
+    def test_skips_the_forbidden_interval(self):
+        self.assertEqual(self.pyp.next_allowed(), datetime.datetime(2021, 4, 5, 9, 31))
+        self.assertEqual(self.pyp.next_allowed(datetime.datetime(2021, 4, 5, 19, 0)),
+                         datetime.datetime(2021, 4, 5, 19, 31))
+        self.assertEqual(self.pyp.next_allowed(datetime.datetime(2021, 4, 5, 12, 0)),
+                         datetime.datetime(2021, 4, 5, 12, 0))
+
+    def test_never_returns_an_earlier_instant(self):
+        cases = [
+            (datetime.datetime(2021, 4, 5, 9, 31, 40), datetime.datetime(2021, 4, 5, 9, 32)),
+            (datetime.datetime(2021, 4, 5, 9, 30, 1), datetime.datetime(2021, 4, 5, 9, 31)),
+            (datetime.datetime(2021, 4, 5, 6, 59, 0, 1), datetime.datetime(2021, 4, 5, 9, 31)),
+            (datetime.datetime(2021, 4, 5, 23, 59, 30), datetime.datetime(2021, 4, 6, 0, 0)),
+        ]
+        for after, expected in cases:
+            with self.subTest(after=after):
+                result = self.pyp.next_allowed(after)
+                self.assertEqual(result, expected)
+                self.assertGreaterEqual(result, after)
+
+    def test_rejects_other_types(self):
+        for after in (datetime.date(2021, 4, 5), '2021-04-05 08:00'):
+            with self.subTest(after=after):
+                with self.assertRaises(ValueError):
+                    self.pyp.next_allowed(after)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+"""
+Pruebas de AbstractHolidayClient y TokenBucket contra un servidor HTTP local que imita la
+API de vacaciones de abstractapi.
+"""
+import http.server
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from picoplaca import AbstractHolidayClient, TokenBucket
+
+# Feriados que informa el servidor local, por fecha AAAA-MM-DD
+HOLIDAYS = {
+    '2021-01-01': "New Year's Day",
+    '2021-04-01': 'Maundy Thursday',
+    '2021-04-02': 'Good Friday',
+}
+
+
+class StandInAPI(http.server.BaseHTTPRequestHandler):
+    """
+    Imita la API de abstractapi: responde 401 sin api_key y registra cada solicitud con el
+    puerto del cliente para comprobar la reutilización de conexiones
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+        self.server.calls.append((query, self.client_address[1]))
+        if not query.get('api_key'):
+            self.send_response(401)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if 'day' in query:
+            date = '{}-{:0>2}-{:0>2}'.format(query.get('year'), query.get('month'), query.get('day'))
+            body = [{'name': HOLIDAYS[date]}] if date in HOLIDAYS else []
+        else:
+            # Consulta de sync: todos los feriados del año o del mes, con la fecha MM/DD/AAAA
+            prefix = '{}-{:0>2}'.format(query.get('year'), query['month']) if 'month' in query else query.get('year')
+            body = [{'name': name, 'date': '{}/{}/{}'.format(date[5:7], date[8:], date[:4])}
+                    for date, name in HOLIDAYS.items() if date.startswith(prefix)]
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class AbstractHolidayClientTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInAPI)
+        cls.server.daemon_threads = True
+        cls.server.calls = []
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = 'http://127.0.0.1:{}/v1/'.format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.calls.clear()
+        self.tmp = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmp, 'cache.sqlite3')
+        self.clients = []
+
+    def tearDown(self):
+        for client in self.clients:
+            client.close()
+        shutil.rmtree(self.tmp)
+
+    def client(self, **kwargs):
+        options = dict(api_key='test', base_url=self.base_url, cache_path=self.cache_path, rate=1000)
+        options.update(kwargs)
+        client = AbstractHolidayClient(**options)
+        self.clients.append(client)
+        return client
+
+    def test_date_is_fetched_once_while_fresh(self):
+        client = self.client()
+        self.assertTrue(client.is_holiday('2021-01-01'))
+        self.assertTrue(client.is_holiday('2021-01-01'))
+        self.assertEqual(len(self.server.calls), 1)
+        # La cache en disco también sirve a otro cliente
+        self.assertEqual(self.client().lookup('2021-01-01'), (True, True))
+        self.assertEqual(len(self.server.calls), 1)
+
+    def test_expired_response_is_fetched_again(self):
+        client = self.client(ttl=0.2)
+        self.assertFalse(client.is_holiday('2021-01-04'))
+        self.assertFalse(client.is_holiday('2021-01-04'))
+        self.assertEqual(len(self.server.calls), 1)
+        time.sleep(0.3)
+        self.assertFalse(client.is_holiday('2021-01-04'))
+        self.assertEqual(len(self.server.calls), 2)
+
+    def test_monthly_quota_raises_http_error(self):
+        client = self.client(monthly_quota=2)
+        client.is_holiday('2021-01-04')
+        client.is_holiday('2021-01-05')
+        with self.assertRaises(requests.HTTPError):
+            client.is_holiday('2021-01-06')
+        self.assertEqual(len(self.server.calls), 2)
+        # El contador se guarda en la cache en disco
+        with self.assertRaises(requests.HTTPError):
+            self.client(monthly_quota=2).is_holiday('2021-01-07')
+
+    def test_missing_api_key_raises(self):
+        with self.assertRaises(requests.HTTPError):
+            self.client(api_key='').is_holiday('2021-01-01')
+
+    def test_maundy_thursday_is_not_a_holiday(self):
+        client = self.client()
+        self.assertFalse(client.is_holiday('2021-04-01'))
+        self.assertTrue(client.is_holiday('2021-04-02'))
+
+    def test_session_reuses_the_connection(self):
+        client = self.client()
+        for day in range(4, 9):
+            client.is_holiday('2021-01-{:02d}'.format(day))
+        self.assertEqual(len(self.server.calls), 5)
+        self.assertEqual(len({port for _, port in self.server.calls}), 1)
+
+
+    def test_snapshot_synced_by_another_client_is_picked_up(self):
+        reader = self.client()
+        reader.SNAPSHOT_RECHECK = 0.2
+        self.assertIsNone(reader._snapshot(2021))
+        self.client().sync([2021], granularity='year')
+        calls = len(self.server.calls)
+        # El año ausente no queda en memoria como None para siempre
+        time.sleep(0.3)
+        self.assertTrue(reader.is_holiday('2021-04-02'))
+        self.assertFalse(reader.is_holiday('2021-04-01'))
+        self.assertEqual(len(self.server.calls), calls)
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def test_rate_is_limited(self):
+        bucket = TokenBucket(rate=20)
+        start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        # La primera ficha está disponible; las otras cuatro esperan 1/20 s cada una
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Pruebas de PredictionServer con solicitudes HTTP/1.1 escritas a mano, incluidas las mal formadas.
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from picoplaca import PredictionServer
+
+
+class PredictionServerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = PredictionServer(port=0)
+        await self.server.start()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def request(self, head, body=b''):
+        """Envía una solicitud y devuelve (código de estado, contenido JSON)"""
+        reader, writer = await asyncio.open_connection(self.server.host, self.server.port)
+        try:
+            writer.write(head.encode('latin-1') + b'\r\n\r\n' + body)
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            return status, json.loads(await reader.readexactly(length))
+        finally:
+            writer.close()
+
+    async def batch(self, payload):
+        body = json.dumps(payload).encode('utf-8')
+        return await self.request('POST /predict/batch HTTP/1.1\r\nConnection: close\r\n'
+                                  'Content-Length: {}'.format(len(body)), body)
+
+    async def test_predict(self):
+        status, payload = await self.request(
+            'GET /predict?plate=PBX-1231&date=2021-04-05&time=08:00 HTTP/1.1\r\nConnection: close')
+        self.assertEqual(status, 200)
+        self.assertFalse(payload['allowed'])
+
+    async def test_invalid_content_length(self):
+        for value in ('abc', '-5'):
+            with self.subTest(value=value):
+                status, payload = await self.request(
+                    'POST /predict/batch HTTP/1.1\r\nContent-Length: {}'.format(value))
+                self.assertEqual(status, 400)
+                self.assertIn('error', payload)
+
+    async def test_batch(self):
+        status, payload = await self.batch(
+            {'plates': ['PBX-1231', 'PBX-1234'], 'dates': ['2021-04-05'] * 2, 'times': ['08:00'] * 2})
+        self.assertEqual((status, payload), (200, {'allowed': [False, True]}))
+
+    async def test_batch_size_is_capped(self):
+        self.server.max_batch = 2
+        status, payload = await self.batch({'plates': ['PBX-1234'] * 3, 'dates': ['2021-04-05'] * 3,
+                                            'times': ['08:00'] * 3})
+        self.assertEqual(status, 413)
+        self.assertIn('error', payload)
+
+    async def test_batch_does_not_block_other_connections(self):
+        # Mientras se evalúa un lote en el hilo aparte, el bucle de eventos sigue atendiendo
+        started, release = threading.Event(), threading.Event()
+        predict_batch = self.server._predict_batch
+
+        def slow_batch(body):
+            started.set()
+            release.wait(5)
+            return predict_batch(body)
+
+        self.server._predict_batch = slow_batch
+        batch = asyncio.ensure_future(self.batch({'plates': ['PBX-1231'], 'dates': ['2021-04-05'], 'times': ['08:00']}))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        status, _ = await self.request(
+            'GET /predict?plate=PBX-1231&date=2021-04-05&time=08:00 HTTP/1.1\r\nConnection: close')
+        self.assertEqual(status, 200)
+        self.assertFalse(batch.done())
+        release.set()
+        self.assertEqual(await batch, (200, {'allowed': [False]}))
+
+    async def test_batch_rejects_malformed_payloads(self):
+        payloads = [
+            [1, 2, 3],
+            {'plates': 5, 'dates': 6, 'times': 7},
+            {'plates': 'PBX-1234', 'dates': '2021-04-05', 'times': '08:00'},
+            {'plates': ['PBX-1234'], 'dates': ['2021-04-05'], 'times': ['08:00'], 'prov': ['EC-P']},
+            {'plates': [1], 'dates': [None], 'times': [{}]},
+            {'plates': [['PBX-1234', 'PBX-1234']], 'dates': ['2021-04-05'], 'times': ['08:00']},
+        ]
+        for request in payloads:
+            with self.subTest(request=request):
+                status, payload = await self.batch(request)
+                self.assertEqual(status, 400)
+                self.assertIn('error', payload)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+"""
+Pruebas de las reglas de restricción configurables: RestrictionRules, RestrictionSchedule,
+load_restrictions, RestrictionWatcher y su efecto en predict, predict_many y DecisionTable.
+"""
+import contextlib
+import datetime
+import io
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from picoplaca import (DEFAULT_RESTRICTIONS, UNRESTRICTED, DecisionTable, PicoPlaca, RestrictionRules,
+                       RestrictionSchedule, RestrictionWatcher, load_restrictions, restrictions)
+
+
+def day(iso):
+    return datetime.date.fromisoformat(iso).toordinal()
+
+
+# La ordenanza por defecto hasta 2021 y, desde 2022, restricción todo el día para los
+# dígitos pares de lunes a viernes, con sólo la letra B y las placas de dos letras exentas
+ALL_DAY = {
+    "name": "Todo el día",
+    "since": "2022-01-01",
+    "until": None,
+    "days": {"Lunes": [0, 2, 4, 6, 8], "Martes": [0, 2, 4, 6, 8], "Miercoles": [0, 2, 4, 6, 8],
+             "Jueves": [0, 2, 4, 6, 8], "Viernes": [0, 2, 4, 6, 8]},
+    "hours": [["00:00", "23:59"]],
+    "exempt_letters": "B",
+    "exempt_short": True,
+}
+CUSTOM = {"rule_sets": [dict(DEFAULT_RESTRICTIONS["rule_sets"][0], until="2021-12-31"), ALL_DAY]}
+
+
+class RestrictionRulesTest(unittest.TestCase):
+
+    def test_default_round_trip(self):
+        rules = RestrictionRules.from_dict(DEFAULT_RESTRICTIONS["rule_sets"][0])
+        self.assertEqual(RestrictionRules.from_dict(rules.to_dict()).to_dict(), rules.to_dict())
+        self.assertEqual(rules.windows, ((7 * 60, 9 * 60 + 30), (16 * 60, 19 * 60 + 30)))
+        self.assertEqual(rules.restricted_digits(day('2021-04-05')), frozenset({1, 2}))
+        self.assertEqual(rules.restricted_digits(day('2021-04-10')), frozenset())
+
+    def test_hours_are_merged(self):
+        rules = RestrictionRules.from_dict({"name": "x", "hours": [["08:00", "09:00"], ["07:00", "08:30"],
+                                                                   ["09:01", "10:00"], ["12:00", "12:00"]]})
+        self.assertEqual(rules.windows, ((7 * 60, 10 * 60), (12 * 60, 12 * 60)))
+
+    def test_all_day_window(self):
+        rules = RestrictionRules.from_dict(ALL_DAY)
+        self.assertEqual(rules.windows, ((0, 24 * 60 - 1),))
+        self.assertEqual(rules.minutes, b'\x01' * (24 * 60))
+
+    def test_invalid_rules(self):
+        base = DEFAULT_RESTRICTIONS["rule_sets"][0]
+        for change in ({"days": {"Feriado": [1]}}, {"days": {"Lunes": [10]}}, {"days": {"Lunes": ["1"]}},
+                       {"hours": [["07:00", "24:00"]]}, {"hours": [["09:00", "08:00"]]}, {"hours": [["7:00", "08:00"]]},
+                       {"exempt_letters": "a"}, {"since": "2022-01-01", "until": "2021-01-01"},
+                       {"since": "2021/01/01"}):
+            with self.subTest(change=change):
+                with self.assertRaises(ValueError):
+                    RestrictionRules.from_dict(dict(base, **change))
+
+
+class RestrictionScheduleTest(unittest.TestCase):
+
+    def test_overlapping_rule_sets_are_rejected(self):
+        for until in (None, "2022-01-01"):
+            first = dict(DEFAULT_RESTRICTIONS["rule_sets"][0], until=until)
+            with self.subTest(until=until):
+                with self.assertRaises(ValueError):
+                    RestrictionSchedule.from_dict({"rule_sets": [ALL_DAY, first]})
+        with self.assertRaises(ValueError):
+            RestrictionSchedule.from_dict({"rules": []})
+
+    def test_effective_dates(self):
+        gap = dict(ALL_DAY, since="2022-03-01", until="2022-03-31")
+        schedule = RestrictionSchedule.from_dict(
+            {"rule_sets": [gap, dict(DEFAULT_RESTRICTIONS["rule_sets"][0], until="2021-12-31")]})
+        self.assertEqual(schedule.at(day('2021-12-31')).name, "Ordenanza Metropolitana 0305")
+        self.assertIs(schedule.at(day('2022-01-01')), UNRESTRICTED)
+        self.assertEqual(schedule.at(day('2022-03-01')).name, "Todo el día")
+        self.assertEqual(schedule.at(day('2022-03-31')).name, "Todo el día")
+        self.assertIs(schedule.at(day('2022-04-01')), UNRESTRICTED)
+        # index() y at() eligen las mismas reglas
+        ordinals = list(range(day('2021-12-25'), day('2022-04-05')))
+        rule_sets = schedule.rule_sets + (UNRESTRICTED,)
+        self.assertEqual([rule_sets[i] for i in schedule.index(ordinals).tolist()],
+                         [schedule.at(ordinal) for ordinal in ordinals])
+
+    def test_fingerprint(self):
+        default = RestrictionSchedule.from_dict(DEFAULT_RESTRICTIONS)
+        self.assertEqual(default.fingerprint, RestrictionSchedule.from_dict(DEFAULT_RESTRICTIONS).fingerprint)
+        self.assertEqual(default.fingerprint, RestrictionSchedule.from_dict(default.to_dict()).fingerprint)
+        self.assertNotEqual(default.fingerprint, RestrictionSchedule.from_dict(CUSTOM).fingerprint)
+
+
+class LoadedRestrictionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = restrictions()
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        PicoPlaca.use_decision_table(None)
+        load_restrictions(self.previous)
+        shutil.rmtree(self.tmp)
+
+    def test_predict_follows_the_loaded_rules(self):
+        load_restrictions(CUSTOM)
+        cases = [
+            # Ordenanza por defecto hasta 2021
+            (('PBX-1231', '2021-12-27', '08:00'), False),
+            (('PBX-1234', '2021-12-27', '08:00'), True),
+            (('PBX-1231', '2021-12-27', '12:00'), True),
+            (('PAX-1231', '2021-12-27', '08:00'), True),
+            # Desde 2022 todo el día, dígitos pares, sólo B exenta
+            (('PAX-1232', '2022-01-03', '03:00'), False),
+            (('PBX-1232', '2022-01-03', '03:00'), True),
+            (('PCX-1231', '2022-01-03', '08:00'), True),
+            (('PCX-1232', '2022-01-08', '08:00'), True),
+            (('PC-1232', '2022-01-03', '08:00'), True),
+        ]
+        plates, dates, times = zip(*(record for record, _ in cases))
+        self.assertEqual([PicoPlaca(*record).predict() for record, _ in cases], [allowed for _, allowed in cases])
+        self.assertEqual(PicoPlaca.predict_many(plates, dates, times).tolist(), [allowed for _, allowed in cases])
+        # Sin horas libres el lunes, el siguiente momento permitido es el sábado
+        self.assertEqual(PicoPlaca('PAX-1232', '2022-01-03', '03:00').next_allowed(),
+                         datetime.datetime(2022, 1, 8))
+
+    def test_predict_many_matches_predict(self):
+        load_restrictions(CUSTOM)
+        records = list(itertools.product(['PAX-1231', 'PBX-1232', 'PCX-1238', 'PC-1230'],
+                                         ['2021-12-30', '2022-01-03', '2022-01-06', '2022-01-09'],
+                                         ['00:00', '07:00', '09:31', '18:00']))
+        plates, dates, times = zip(*records)
+        self.assertEqual(PicoPlaca.predict_many(plates, dates, times).tolist(),
+                         [PicoPlaca(*record).predict() for record in records])
+
+    def test_stale_decision_table_is_not_used(self):
+        path = os.path.join(self.tmp, 'table.bin')
+        DecisionTable.compile(path, 2022, 2022)
+        table = DecisionTable.load(path)
+        self.addCleanup(table.close)
+        PicoPlaca.use_decision_table(table)
+        record = ('PAX-1232', '2022-01-03', '03:00')
+        self.assertTrue(table.usable('EC-P', day('2022-01-03')))
+        self.assertTrue(PicoPlaca(*record).predict())
+        load_restrictions(CUSTOM)
+        self.assertFalse(table.usable('EC-P', day('2022-01-03')))
+        self.assertFalse(PicoPlaca(*record).predict())
+        with self.assertRaises(ValueError):
+            table.predict(*record)
+
+    def test_watcher_reloads_and_keeps_the_last_valid_rules(self):
+        path = os.path.join(self.tmp, 'rules.json')
+
+        def write(text, mtime):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.utime(path, ns=(mtime, mtime))
+
+        write(json.dumps(DEFAULT_RESTRICTIONS), 10 ** 18)
+        load_restrictions(path)
+        watcher = RestrictionWatcher(path)
+        self.assertFalse(watcher.check())
+
+        write(json.dumps(CUSTOM), 10 ** 18 + 1)
+        self.assertTrue(watcher.check())
+        custom = restrictions()
+        self.assertEqual(custom.fingerprint, RestrictionSchedule.from_dict(CUSTOM).fingerprint)
+
+        for text in ('{"rule_sets": [', json.dumps({"rule_sets": [ALL_DAY, ALL_DAY]})):
+            write(text, 10 ** 18 + 2 + len(text))
+            with contextlib.redirect_stderr(io.StringIO()):
+                self.assertFalse(watcher.check())
+            self.assertIsInstance(watcher.error, ValueError)
+            self.assertIs(restrictions(), custom)
+        # Un archivo no válido no se vuelve a intentar hasta que cambie
+        self.assertFalse(watcher.check())
+
+        write(json.dumps(DEFAULT_RESTRICTIONS), 10 ** 18 + 100)
+        self.assertTrue(watcher.check())
+        self.assertIsNone(watcher.error)
+        self.assertEqual(restrictions().fingerprint, self.previous.fingerprint)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Pruebas de ViolationDetector: equivalencia con PicoPlaca.predict sobre un flujo desordenado y
+cada contador de stats() (tardíos, no válidos, repetidos, pendientes y placas recordadas).
+"""
+import datetime
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from picoplaca import QUITO_TZ, PicoPlaca, Violation, ViolationDetector
+
+# Lunes 2021-04-05 a las 08:00 en Quito: los dígitos 1 y 2 no pueden circular
+RESTRICTED = int(datetime.datetime(2021, 4, 5, 8, 0, tzinfo=QUITO_TZ).timestamp())
+
+
+def predict(plate, epoch):
+    """Veredicto de PicoPlaca.predict para una lectura con marca de tiempo Unix"""
+    moment = datetime.datetime.fromtimestamp(epoch, QUITO_TZ)
+    return PicoPlaca(plate, moment.date().isoformat(), moment.strftime('%H:%M')).predict()
+
+
+class ViolationDetectorTest(unittest.TestCase):
+
+    def test_shuffled_stream_matches_predict(self):
+        rng = random.Random(0)
+        plates = ['PBX-12{:02d}'.format(i) for i in range(30)] + ['PAX-1231', 'PB-1232', 'GUC-0001']
+        # Semana con el Viernes Santo (2021-04-02), lecturas repetidas y horas dentro y fuera de las horas pico
+        start = int(datetime.datetime(2021, 3, 29, tzinfo=QUITO_TZ).timestamp())
+        readings = sorted((start + rng.randrange(7 * 86400), rng.choice(plates)) for _ in range(20000))
+        events = [(plate, epoch, camera) for camera, (epoch, plate) in enumerate(readings)]
+        # Desorden de hasta 50 segundos, menor que la ventana
+        arrival = sorted(events, key=lambda event: event[1] + rng.uniform(0, 50))
+        self.assertNotEqual(arrival, events)
+
+        expected, last, duplicates = [], {}, 0
+        for plate, epoch, camera in events:
+            if predict(plate, epoch):
+                continue
+            if plate in last and epoch - last[plate] <= 300:
+                duplicates += 1
+                continue
+            last[plate] = epoch
+            expected.append(Violation(plate, epoch, camera))
+        self.assertTrue(expected and duplicates)
+
+        detector = ViolationDetector(window=60, dedup=300)
+        self.assertEqual([violation[:2] for violation in detector.run(arrival)],
+                         [violation[:2] for violation in expected])
+        stats = detector.stats()
+        self.assertLessEqual(stats.pop('plates'), len(plates))
+        self.assertEqual(stats, {'events': len(events), 'late': 0, 'invalid': 0, 'duplicates': duplicates,
+                                 'violations': len(expected), 'pending': 0})
+
+    def test_events_older_than_the_watermark_are_dropped(self):
+        detector = ViolationDetector(window=60)
+        self.assertEqual(detector.push('PBX-1231', RESTRICTED + 100), [])
+        self.assertEqual(detector.push('PBX-1232', RESTRICTED + 50), [])
+        self.assertEqual(detector.stats()['pending'], 2)
+        # La marca de agua pasa a RESTRICTED + 140: el evento de RESTRICTED + 100 queda listo
+        self.assertEqual(detector.push('PBC-1231', RESTRICTED + 200),
+                         [Violation('PBX-1232', RESTRICTED + 50, None), Violation('PBX-1231', RESTRICTED + 100, None)])
+        self.assertEqual(detector.push('PBD-1231', RESTRICTED + 139), [])
+        stats = detector.stats()
+        self.assertEqual((stats['late'], stats['pending'], stats['violations']), (1, 1, 2))
+        self.assertEqual(detector.flush(), [Violation('PBC-1231', RESTRICTED + 200, None)])
+
+    def test_invalid_plates_are_counted(self):
+        detector = ViolationDetector()
+        for plate in ('pbx-1231', 'PBX-123', 1231, None):
+            detector.push(plate, RESTRICTED)
+        self.assertEqual(detector.flush(), [])
+        self.assertEqual(detector.stats()['invalid'], 4)
+
+    def test_repeated_readings_are_suppressed_within_dedup(self):
+        detector = ViolationDetector(window=0, dedup=300)
+        readings = [RESTRICTED, RESTRICTED + 100, RESTRICTED + 300, RESTRICTED + 301, RESTRICTED + 500]
+        violations = [v for epoch in readings for v in detector.push('PBX-1231', epoch, 'c')] + detector.flush()
+        self.assertEqual([v.epoch for v in violations], [RESTRICTED, RESTRICTED + 301])
+        self.assertEqual(detector.stats()['duplicates'], 3)
+        # Pasado el intervalo de supresión la placa se olvida
+        detector.push('PBC-1231', RESTRICTED + 1000)
+        self.assertEqual(detector.stats()['plates'], 1)
+
+    def test_pending_events_are_bounded(self):
+        detector = ViolationDetector(window=10 ** 9, max_pending=3)
+        violations = []
+        for offset in (5, 1, 4, 2, 3):
+            violations += detector.push('PBX-12{}1'.format(offset), RESTRICTED + offset)
+        # Al superar el límite se procesa el más antiguo y la marca de agua avanza hasta él
+        self.assertEqual([v.epoch - RESTRICTED for v in violations], [1, 2])
+        self.assertEqual(detector.stats()['pending'], 3)
+        self.assertEqual(detector.push('PBX-1201', RESTRICTED), [])
+        self.assertEqual(detector.stats()['late'], 1)
+        self.assertEqual([v.epoch - RESTRICTED for v in detector.flush()], [3, 4, 5])
+
+    def test_reported_plates_are_bounded(self):
+        detector = ViolationDetector(window=0, max_plates=2)
+        for i, plate in enumerate(('PBX-1231', 'PBX-1232', 'PBX-1241', 'PBX-1231')):
+            detector.push(plate, RESTRICTED + i)
+            self.assertLessEqual(detector.stats()['plates'], 2)
+        detector.flush()
+        # La placa más antigua se olvidó para respetar el límite, así que se reporta otra vez
+        self.assertEqual(detector.stats()['violations'], 4)
+        self.assertEqual(detector.stats()['duplicates'], 0)
+
+    def test_invalid_arguments(self):
+        for kwargs in ({'window': -1}, {'dedup': -1}, {'max_pending': 0}, {'max_plates': 0}, {'prov': 'EC-XX'}):
+            with self.subTest(**kwargs):
+                with self.assertRaises(ValueError):
+                    ViolationDetector(**kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()